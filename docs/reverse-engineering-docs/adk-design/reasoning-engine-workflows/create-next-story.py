@@ -42,10 +42,13 @@ pip install google-adk google-cloud-firestore google-cloud-storage google-cloud-
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
+import json
 import re
+import time
 from datetime import datetime
 
 # Google Cloud imports
+from google.api_core import exceptions as gcp_exceptions
 from google.cloud import firestore
 from google.cloud import storage
 from google.cloud import aiplatform
@@ -180,6 +183,25 @@ class CreateNextStoryWorkflow(WorkflowAgent):
     completed step using Firestore state persistence.
     """
 
+    # Story sections summarized as presence flags on save, so readers can
+    # check them without fetching the (large) values. Nested paths use '/'.
+    SECTION_PRESENCE_FIELDS = (
+        'title',
+        'user_story',
+        'acceptance_criteria',
+        'technical_context',
+        'technical_context/tech_stack',
+        'technical_context/coding_standards',
+        'technical_context/testing_strategy',
+        'dev_notes',
+        'dev_agent_record',
+    )
+
+    # Sharded architecture location and the manifest written by ShardDocWorkflow
+    ARCHITECTURE_DIR = "architecture/"
+    SHARD_MANIFEST = "manifest.json"
+    MANIFEST_REVALIDATE_SECONDS = 30
+
     def __init__(
         self,
         project_id: str,
@@ -205,6 +227,11 @@ class CreateNextStoryWorkflow(WorkflowAgent):
         # Workflow state
         self.state: Optional[WorkflowState] = None
 
+        # Shard manifest (generation, manifest, checked_at) and shard content
+        # cache keyed by (file, section anchor) -> (generation, content)
+        self._manifest_cache: Dict[str, Tuple[int, Dict, float]] = {}
+        self._shard_cache: Dict[Tuple[str, str, Optional[str]], Tuple[int, str]] = {}
+
     # ========================================================================
     # Step 0: Load Core Configuration
     # ========================================================================
@@ -896,12 +923,76 @@ This section will be populated by the SM agent based on story-specific analysis.
     def _read_architecture_file(
         self,
         project_id: str,
-        filename: str
+        filename: str,
+        section: Optional[str] = None
     ) -> str:
-        """Read architecture file from Cloud Storage"""
-        # Implementation: Read from Cloud Storage
-        # Placeholder for design
-        return f"Content of {filename}"
+        """
+        Read a sharded architecture file, or one section of it by anchor.
+
+        The shard manifest gives each file's generation and per-heading byte
+        ranges: cached content is reused while the generation is unchanged,
+        a section is fetched with a ranged read, and reads are pinned to the
+        manifest's generation. Returns "" if the file or section is absent.
+        """
+        bucket = self.storage.bucket(f"bmad-{project_id}-artifacts")
+
+        for refresh in (False, True):
+            entry = self._load_shard_manifest(project_id, bucket, refresh).get('shards', {}).get(filename)
+            if entry is None:
+                return ""
+
+            start, length = 0, entry['size']
+            if section is not None:
+                match = next((s for s in entry.get('sections', []) if s['anchor'] == section), None)
+                if match is None:
+                    return ""
+                start, length = match['offset'], match['length']
+
+            # Without a recorded generation the content cannot be revalidated, so it is not cached
+            generation = entry.get('generation')
+            key = (project_id, filename, section)
+            cached = self._shard_cache.get(key)
+            if generation is not None and cached and cached[0] == generation:
+                return cached[1]
+            if length == 0:
+                return ""
+
+            try:
+                data = bucket.blob(self.ARCHITECTURE_DIR + filename).download_as_bytes(
+                    start=start,
+                    end=start + length - 1,
+                    if_generation_match=generation
+                )
+            except (gcp_exceptions.PreconditionFailed, gcp_exceptions.NotFound):
+                # Re-sharded since the manifest was read; refresh it once
+                continue
+
+            content = data.decode('utf-8')
+            if generation is not None:
+                self._shard_cache[key] = (generation, content)
+            return content
+
+        raise RuntimeError(f"Architecture shard changed while reading: {filename}")
+
+    def _load_shard_manifest(self, project_id: str, bucket: storage.Bucket, refresh: bool = False) -> Dict:
+        """Load the architecture shard manifest, revalidating by generation without re-downloading"""
+        cached = self._manifest_cache.get(project_id)
+        if cached and not refresh and time.time() - cached[2] < self.MANIFEST_REVALIDATE_SECONDS:
+            return cached[1]
+
+        blob = bucket.blob(self.ARCHITECTURE_DIR + self.SHARD_MANIFEST)
+        try:
+            data = blob.download_as_bytes(if_generation_not_match=cached[0] if cached else None)
+        except gcp_exceptions.NotModified:
+            self._manifest_cache[project_id] = (cached[0], cached[1], time.time())
+            return cached[1]
+        except gcp_exceptions.NotFound:
+            # Architecture not sharded yet
+            return {}
+
+        manifest = json.loads(data)
+        self._manifest_cache[project_id] = (blob.generation, manifest, time.time())
+        return manifest
 
     def _generate_architecture_references(self, story_type: StoryType) -> List[str]:
         """Generate list of architecture files referenced for this story"""
@@ -960,7 +1051,7 @@ This section will be populated by the SM agent based on story-specific analysis.
         return WorkflowState(project_id=project_id, workflow_id=workflow_id)
 
     def _save_story(self, project_id: str, story_content: Dict):
-        """Save completed story to Firestore"""
+        """Save completed story to Firestore (with section presence flags)"""
         story_id = f"{story_content['epic']}.{story_content['story']}"
         story_ref = (
             self.db.collection('projects')
@@ -968,9 +1059,24 @@ This section will be populated by the SM agent based on story-specific analysis.
             .collection('stories')
             .document(story_id)
         )
-        story_ref.set(story_content)
+        story_ref.set({
+            **story_content,
+            'section_presence': self._section_presence(story_content),
+            # Same commit time as the document's update_time; later writes make the flags stale
+            'section_presence_at': firestore.SERVER_TIMESTAMP
+        })
         print(f"  ✓ Story saved to Firestore: {story_id}")
 
+    def _section_presence(self, story_content: Dict) -> Dict[str, bool]:
+        """Whether each tracked section is present and non-empty"""
+        presence = {}
+        for path in self.SECTION_PRESENCE_FIELDS:
+            value = story_content
+            for key in path.split('/'):
+                value = value.get(key) if isinstance(value, dict) else None
+            presence[path] = bool(value)
+        return presence
+
     def _save_error_state(self, workflow_id: str, error_state: Dict):
         """Save error state for debugging"""
         error_ref = (
@@ -9,9 +9,20 @@ Reasoning Engine implementation for execute-checklist task.
 **Analysis Reference**: analysis/tasks/execute-checklist.md
 """
 
-from typing import Dict, List, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Callable, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import yaml
 from google.cloud import firestore, storage
 from google import adk
 from adk.workflows import WorkflowAgent, WorkflowStep
@@ -26,6 +37,12 @@ class ChecklistItem:
     validation_method: str  # manual, automated, llm
     passed: bool = False
     notes: str = ""
+    # Pre-bound automated check (artifact -> bool), set by ChecklistRegistry
+    check: Optional[Callable[[Dict], bool]] = field(default=None, repr=False, compare=False)
+    # Artifact fields this item reads (empty = whole artifact)
+    reads: List[str] = field(default_factory=list)
+    # Hash of the artifact fields the item was evaluated against
+    input_hash: str = ""
 
 
 @dataclass
@@ -37,6 +54,267 @@ class ChecklistResult:
     passed: bool
     executed_at: str
     executor: str
+    checklist_version: str = ""
+
+
+# ============================================================================
+# Compiled Checklist Registry
+# ============================================================================
+
+def _check_field_present(artifact: Dict, field: str) -> bool:
+    """Field exists and is non-empty"""
+    return bool(artifact.get(field))
+
+
+def _check_min_items(artifact: Dict, field: str, count: int) -> bool:
+    """List field has at least `count` entries"""
+    return len(artifact.get(field) or []) >= count
+
+
+def _check_matches(artifact: Dict, field: str, pattern: str) -> bool:
+    """String field matches a regular expression"""
+    return re.search(pattern, str(artifact.get(field, ''))) is not None
+
+
+# Automated check catalog referenced by `check:` in checklist YAML
+AUTOMATED_CHECKS: Dict[str, Callable[..., bool]] = {
+    'field_present': _check_field_present,
+    'min_items': _check_min_items,
+    'matches': _check_matches,
+}
+
+
+@dataclass(frozen=True)
+class CompiledChecklist:
+    """
+    Parsed checklist definition for one template generation.
+
+    Items are kept as immutable tuples with automated checks already bound,
+    so instantiate() only has to allocate the per-run ChecklistItem objects.
+    """
+    name: str
+    generation: int
+    version: str  # content hash of the item definitions
+    items: Tuple[Tuple[str, str, str, str, Optional[Callable[[Dict], bool]], Tuple[str, ...]], ...]
+
+    def instantiate(self) -> List[ChecklistItem]:
+        """Create fresh, mutable items for a single run"""
+        return [
+            ChecklistItem(
+                item_id=item_id,
+                description=description,
+                category=category,
+                validation_method=method,
+                check=check,
+                reads=list(reads)
+            )
+            for item_id, description, category, method, check, reads in self.items
+        ]
+
+
+class ChecklistRegistry:
+    """
+    Process-wide cache of compiled checklists.
+
+    Checklists live at gs://bmad-templates/checklists/{name}.yaml:
+
+        version: 2
+        items:
+          - id: "1"
+            description: Story has clear title
+            category: completeness
+            validation_method: automated
+            check: field_present
+            args: {field: title}
+            reads: [title]
+
+    Each definition is parsed once per object generation. The downloaded YAML
+    is also written to a local snapshot directory so other processes on the
+    same host (and restarts) skip the download. Object metadata is
+    revalidated at most every `revalidate_seconds`.
+    """
+
+    TEMPLATE_BUCKET = "bmad-templates"
+    DEFAULT_SNAPSHOT_DIR = os.path.join(tempfile.gettempdir(), "bmad-checklists")
+
+    _shared: Optional['ChecklistRegistry'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        storage_client: storage.Client,
+        snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+        revalidate_seconds: float = 60.0
+    ):
+        self.storage = storage_client
+        self.snapshot_dir = snapshot_dir
+        self.revalidate_seconds = revalidate_seconds
+        self._compiled: Dict[str, CompiledChecklist] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()  # guards _name_locks only
+        self._name_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def shared(cls, storage_client: storage.Client) -> 'ChecklistRegistry':
+        """Return the registry shared by all workflow instances in this process"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(storage_client)
+            return cls._shared
+
+    def get(self, checklist_name: str) -> CompiledChecklist:
+        """
+        Return the compiled checklist, recompiling only on a new generation.
+
+        Loads are serialized per checklist name, so concurrent callers of the
+        same checklist share one download while different checklists load in
+        parallel.
+        """
+        with self._lock:
+            name_lock = self._name_locks.setdefault(checklist_name, threading.Lock())
+
+        with name_lock:
+            compiled = self._compiled.get(checklist_name)
+            fresh = time.monotonic() - self._checked_at.get(checklist_name, 0.0) < self.revalidate_seconds
+            if compiled and fresh:
+                return compiled
+
+            blob = self.storage.bucket(self.TEMPLATE_BUCKET).get_blob(f"checklists/{checklist_name}.yaml")
+            if blob is None:
+                raise ValueError(f"Checklist not found: {checklist_name}")
+
+            if not compiled or compiled.generation != blob.generation:
+                source = self._read_snapshot(checklist_name, blob.generation)
+                if source is None:
+                    source = blob.download_as_bytes(if_generation_match=blob.generation)
+                    self._write_snapshot(checklist_name, blob.generation, source)
+                compiled = self._compile(checklist_name, blob.generation, yaml.safe_load(source))
+                self._compiled[checklist_name] = compiled
+
+            self._checked_at[checklist_name] = time.monotonic()
+            return compiled
+
+    def _compile(self, name: str, generation: int, definition: Dict) -> CompiledChecklist:
+        """Validate a parsed definition and bind automated checks"""
+        items = []
+        for raw in definition.get('items', []):
+            method = raw.get('validation_method', 'manual')
+            check = None
+            if method == 'automated':
+                check_name = raw.get('check')
+                if check_name not in AUTOMATED_CHECKS:
+                    raise ValueError(
+                        f"Checklist '{name}' item {raw.get('id')}: unknown automated check '{check_name}'"
+                    )
+                check = partial(AUTOMATED_CHECKS[check_name], **raw.get('args', {}))
+
+            items.append((
+                str(raw['id']), raw['description'], raw.get('category', ''),
+                method, check, tuple(raw.get('reads', []))
+            ))
+
+        return CompiledChecklist(
+            name=name,
+            generation=generation,
+            version=self._definition_hash(definition.get('items', [])),
+            items=tuple(items)
+        )
+
+    @staticmethod
+    def _definition_hash(raw_items: List[Dict]) -> str:
+        """
+        Content hash of the item definitions.
+
+        Memoized outcomes and stored results are keyed on this rather than
+        the hand-maintained `version:` field, so editing an item's check,
+        args or prompt invalidates them even if nobody bumps the version.
+        """
+        encoded = json.dumps(raw_items, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def _snapshot_path(self, name: str, generation: int) -> str:
+        return os.path.join(self.snapshot_dir, f"{name}.{generation}.yaml")
+
+    def _read_snapshot(self, name: str, generation: int) -> Optional[bytes]:
+        try:
+            with open(self._snapshot_path(name, generation), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_snapshot(self, name: str, generation: int, source: bytes):
+        """
+        Write the raw YAML atomically so concurrent processes never read a
+        partial file; keeping the source bytes preserves YAML-only types
+        such as dates.
+        """
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(source)
+        os.replace(tmp_path, self._snapshot_path(name, generation))
+
+
+# Notes of items that were not actually evaluated (never memoized)
+SKIPPED_NOTE = "Skipped (fail-fast: result already decided)"
+LLM_ERROR_NOTE = "LLM validation error"
+
+
+class CheckResultMemo:
+    """
+    Bounded LRU memo of item outcomes keyed by
+    (checklist_name, item_id, checklist_version, input_hash).
+
+    Entries are seeded from stored checklist_results (which record the input
+    hash per item), so memoization survives process restarts. Only items
+    that were evaluated carry an input hash; skipped and errored items are
+    never memoized.
+    """
+
+    _shared: Optional['CheckResultMemo'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str, str, str], Tuple[bool, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'CheckResultMemo':
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def get(self, key: Tuple[str, str, str, str]) -> Optional[Tuple[bool, str]]:
+        with self._lock:
+            outcome = self._entries.get(key)
+            if outcome is not None:
+                self._entries.move_to_end(key)
+            return outcome
+
+    def put(self, key: Tuple[str, str, str, str], passed: bool, notes: str):
+        with self._lock:
+            self._entries[key] = (passed, notes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def seed(self, stored_result: Optional[Dict]):
+        """Load outcomes from a stored checklist_results document"""
+        if not stored_result:
+            return
+        name = stored_result.get('checklist_id')
+        version = stored_result.get('checklist_version')
+        if not name or not version:
+            return
+        for item in stored_result.get('items', []):
+            notes = item.get('notes', '')
+            # Results written before skipped/errored items cleared their hash
+            if notes == SKIPPED_NOTE or notes.startswith(LLM_ERROR_NOTE):
+                continue
+            if item.get('input_hash'):
+                self.put((name, item['item_id'], version, item['input_hash']), item['passed'], notes)
 
 
 class ExecuteChecklistWorkflow(WorkflowAgent):
@@ -50,35 +328,33 @@ class ExecuteChecklistWorkflow(WorkflowAgent):
     - qa-review-checklist (QA validates test coverage)
     """
 
-    def __init__(self, project_id: str, **kwargs):
+    # Upper bound on LLM validations running at the same time
+    DEFAULT_LLM_CONCURRENCY = 4
+
+    SKIPPED_NOTE = SKIPPED_NOTE
+
+    # Firestore caps a WriteBatch at 500 operations
+    WRITE_BATCH_SIZE = 500
+
+    def __init__(self, project_id: str, llm_concurrency: int = DEFAULT_LLM_CONCURRENCY, **kwargs):
         super().__init__()
         self.project_id = project_id
         self.db = firestore.Client(project=project_id)
         self.storage = storage.Client(project=project_id)
+        self.llm_concurrency = llm_concurrency
+        self.registry = kwargs.get('checklist_registry') or ChecklistRegistry.shared(self.storage)
+        self.memo = kwargs.get('check_memo') or CheckResultMemo.shared()
 
     @WorkflowStep(step_id="step_1_load_checklist", description="Load checklist definition")
-    def load_checklist(self, checklist_name: str) -> List[ChecklistItem]:
-        """Load checklist definition from Cloud Storage"""
-        # In production, load from gs://bmad-templates/checklists/{checklist_name}.yaml
-        # Parse YAML to ChecklistItem objects
-
-        # Placeholder for design
-        example_items = [
-            ChecklistItem(
-                item_id="1",
-                description="Story has clear title",
-                category="completeness",
-                validation_method="automated"
-            ),
-            ChecklistItem(
-                item_id="2",
-                description="Acceptance criteria are testable",
-                category="quality",
-                validation_method="llm"
-            ),
-        ]
-
-        return example_items
+    def load_checklist(
+        self,
+        checklist_name: str,
+        compiled: Optional[CompiledChecklist] = None
+    ) -> List[ChecklistItem]:
+        """Load checklist items from the compiled registry (fresh instances per run)"""
+        if compiled is None:
+            compiled = self.registry.get(checklist_name)
+        return compiled.instantiate()
 
     @WorkflowStep(step_id="step_2_execute_checks", description="Execute checklist items")
     def execute_checks(
@@ -101,6 +377,109 @@ class ExecuteChecklistWorkflow(WorkflowAgent):
 
         return checklist_items
 
+    @WorkflowStep(step_id="step_2_execute_checks_concurrent", description="Execute checklist items cheapest-first with concurrent LLM checks")
+    def execute_checks_concurrent(
+        self,
+        checklist_items: List[ChecklistItem],
+        artifact: Dict,
+        failure_rates: Optional[Dict[str, float]] = None,
+        fail_fast: bool = False,
+        checklist_version: Optional[str] = None,
+        checklist_name: Optional[str] = None
+    ) -> List[ChecklistItem]:
+        """
+        Execute checklist items ordered by cost, then by historical failure rate.
+
+        Automated items are evaluated first on the calling thread since they
+        cost nothing compared to an LLM call. LLM items are then submitted to
+        a bounded thread pool. Within each tier, items that fail most often
+        run first so a failing verdict surfaces early. Manual items are only
+        recorded as awaiting a reviewer.
+
+        With fail_fast, outstanding work is cancelled as soon as one
+        automated or LLM item fails (the overall result is decided at that
+        point, see determine_overall_result). Items that never ran are marked
+        as skipped. Manual items never decide the verdict early, so the
+        automated checks still run when a checklist has manual items.
+
+        When checklist_version and checklist_name are given, automated and
+        LLM outcomes are memoized by (checklist_name, item_id,
+        checklist_version, hash of the fields the item reads); items whose
+        inputs are unchanged reuse the memoized outcome.
+
+        Returns the items in their original definition order.
+        """
+        failure_rates = failure_rates or {}
+
+        def by_failure_rate(item: ChecklistItem) -> float:
+            return -failure_rates.get(item.item_id, 0.0)
+
+        memo_scope = (checklist_name, checklist_version) if checklist_name and checklist_version else None
+
+        remaining = []
+        decided = False
+        for item in checklist_items:
+            if memo_scope is not None and item.validation_method in ("automated", "llm"):
+                item.input_hash = self._input_hash(item, artifact)
+                outcome = self.memo.get((checklist_name, item.item_id, checklist_version, item.input_hash))
+                if outcome is not None:
+                    item.passed, item.notes = outcome
+                    decided = decided or (fail_fast and not item.passed)
+                    continue
+            remaining.append(item)
+
+        automated_items = sorted(
+            (i for i in remaining if i.validation_method == "automated"),
+            key=by_failure_rate
+        )
+        llm_items = sorted(
+            (i for i in remaining if i.validation_method == "llm"),
+            key=by_failure_rate
+        )
+
+        for item in remaining:
+            if item.validation_method not in ("automated", "llm"):
+                item.passed = False
+                item.notes = "Manual validation required"
+
+        for item in automated_items:
+            if decided:
+                self._mark_skipped(item)
+                continue
+            item.passed = self._automated_check(item, artifact)
+            self._remember(item, memo_scope)
+            decided = fail_fast and not item.passed
+
+        if decided:
+            for item in llm_items:
+                self._mark_skipped(item)
+            return checklist_items
+
+        if llm_items:
+            pool = ThreadPoolExecutor(max_workers=self.llm_concurrency)
+            pending = {pool.submit(self._llm_check, item, artifact): item for item in llm_items}
+            try:
+                while pending and not decided:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = pending.pop(future)
+                        try:
+                            item.passed = future.result()
+                            self._remember(item, memo_scope)
+                        except Exception as e:
+                            item.passed = False
+                            item.notes = f"{LLM_ERROR_NOTE}: {str(e)}"
+                            item.input_hash = ""
+                        decided = decided or (fail_fast and not item.passed)
+
+                for item in pending.values():
+                    self._mark_skipped(item)
+            finally:
+                # Queued checks are dropped; in-flight calls finish in the background
+                pool.shutdown(wait=not decided, cancel_futures=True)
+
+        return checklist_items
+
     @WorkflowStep(step_id="step_3_determine_result", description="Determine overall pass/fail")
     def determine_overall_result(self, checklist_items: List[ChecklistItem]) -> bool:
         """Determine if checklist passed overall"""
@@ -112,17 +491,26 @@ class ExecuteChecklistWorkflow(WorkflowAgent):
         bmad_project_id: str,
         checklist_name: str,
         artifact_id: str,
-        artifact_type: str  # story, prd, architecture
+        artifact_type: str,  # story, prd, architecture
+        fail_fast: bool = False
     ) -> Dict:
         """Execute checklist workflow"""
         # Load artifact
         artifact = self._load_artifact(bmad_project_id, artifact_type, artifact_id)
 
         # Load checklist
-        items = self.load_checklist(checklist_name)
+        compiled = self.registry.get(checklist_name)
+        items = self.load_checklist(checklist_name, compiled)
 
-        # Execute checks
-        items = self.execute_checks(items, artifact)
+        # Seed memo from the previous run so unchanged inputs are not re-evaluated
+        result_ref = self._checklist_result_ref(bmad_project_id, checklist_name, artifact_id)
+        self.memo.seed(result_ref.get().to_dict())
+
+        # Execute checks (memo hits, then cheap items, then LLM; likely failures first)
+        failure_rates = self._load_failure_rates(bmad_project_id, checklist_name)
+        items = self.execute_checks_concurrent(
+            items, artifact, failure_rates, fail_fast, compiled.version, checklist_name
+        )
 
         # Determine result
         passed = self.determine_overall_result(items)
@@ -134,7 +522,8 @@ class ExecuteChecklistWorkflow(WorkflowAgent):
             items=items,
             passed=passed,
             executed_at=datetime.now().isoformat(),
-            executor="system"  # or agent name
+            executor="system",  # or agent name
+            checklist_version=compiled.version
         )
 
         # Save result
@@ -146,43 +535,262 @@ class ExecuteChecklistWorkflow(WorkflowAgent):
             'artifact_id': artifact_id,
             'passed': passed,
             'items_passed': sum(1 for i in items if i.passed),
+            'items_skipped': sum(1 for i in items if i.notes == self.SKIPPED_NOTE),
             'items_total': len(items)
         }
 
+    def execute_matrix(
+        self,
+        bmad_project_id: str,
+        checklist_names: List[str],
+        artifact_ids: List[str],
+        artifact_type: str,  # story, prd, architecture
+        fail_fast: bool = False,
+        max_workers: int = 8
+    ) -> Dict:
+        """
+        Execute every checklist against every artifact (project-wide sweeps).
+
+        Artifacts are bulk-loaded in one get_all round trip, checklist/artifact
+        cells run on a worker pool, and results are committed in batched
+        writes. Each cell still bounds its own LLM calls by llm_concurrency,
+        so peak LLM concurrency is max_workers * llm_concurrency.
+
+        A cell that raises (unknown checklist, bad check arguments) is
+        reported under 'errors' and not saved; the other cells are saved.
+        """
+        artifacts = self._load_artifacts(bmad_project_id, artifact_type, artifact_ids)
+        missing = [a for a in artifact_ids if a not in artifacts]
+        errors: List[Dict] = []
+
+        # Per-checklist inputs are resolved once, not once per cell
+        checklists: Dict[str, CompiledChecklist] = {}
+        for name in checklist_names:
+            try:
+                checklists[name] = self.registry.get(name)
+            except Exception as e:
+                errors.extend(
+                    {'checklist_id': name, 'artifact_id': artifact_id, 'error': str(e)}
+                    for artifact_id in artifact_ids
+                    if artifact_id in artifacts
+                )
+        stats_refs = [self._checklist_stats_ref(bmad_project_id, name) for name in checklists]
+        failure_rates = {name: {} for name in checklists}
+        for snapshot in self.db.get_all(stats_refs):
+            if snapshot.exists:
+                failure_rates[snapshot.id] = self._failure_rates(snapshot.to_dict())
+
+        # Seed memo from previous results in one bulk read
+        previous_refs = [
+            self._checklist_result_ref(bmad_project_id, name, artifact_id)
+            for name in checklists
+            for artifact_id in artifacts
+        ]
+        for snapshot in self.db.get_all(previous_refs):
+            if snapshot.exists:
+                self.memo.seed(snapshot.to_dict())
+
+        def run_cell(checklist_name: str, artifact_id: str) -> ChecklistResult:
+            compiled = checklists[checklist_name]
+            items = self.load_checklist(checklist_name, compiled)
+            items = self.execute_checks_concurrent(
+                items, artifacts[artifact_id], failure_rates[checklist_name], fail_fast,
+                compiled.version, checklist_name
+            )
+            return ChecklistResult(
+                checklist_id=checklist_name,
+                artifact_id=artifact_id,
+                items=items,
+                passed=self.determine_overall_result(items),
+                executed_at=datetime.now().isoformat(),
+                executor="system",
+                checklist_version=compiled.version
+            )
+
+        results = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(run_cell, name, artifact_id): (name, artifact_id)
+                for name in checklists
+                for artifact_id in artifact_ids
+                if artifact_id in artifacts
+            }
+            for future, (name, artifact_id) in futures.items():
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    errors.append({'checklist_id': name, 'artifact_id': artifact_id, 'error': str(e)})
+
+        self._save_checklist_results(bmad_project_id, results)
+        if errors:
+            print(f"  ! {len(errors)} checklist cells failed to run (not saved)")
+
+        return {
+            'success': True,
+            'checklists': checklist_names,
+            'artifacts_total': len(artifact_ids),
+            'missing_artifacts': missing,
+            'cells_total': len(results) + len(errors),
+            'cells_passed': sum(1 for r in results if r.passed),
+            'cells_errored': len(errors),
+            'errors': errors,
+            'results': [
+                {
+                    'checklist_id': r.checklist_id,
+                    'artifact_id': r.artifact_id,
+                    'passed': r.passed,
+                    'items_passed': sum(1 for i in r.items if i.passed),
+                    'items_total': len(r.items)
+                }
+                for r in results
+            ]
+        }
+
+    def _input_hash(self, item: ChecklistItem, artifact: Dict) -> str:
+        """Hash the artifact fields an item reads (whole artifact if undeclared)"""
+        inputs = {f: artifact.get(f) for f in item.reads} if item.reads else artifact
+        encoded = json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _remember(self, item: ChecklistItem, memo_scope: Optional[Tuple[str, str]]):
+        """Record an evaluated outcome in the memo"""
+        if memo_scope is not None and item.input_hash:
+            checklist_name, checklist_version = memo_scope
+            self.memo.put((checklist_name, item.item_id, checklist_version, item.input_hash), item.passed, item.notes)
+
+    def _mark_skipped(self, item: ChecklistItem):
+        """Mark an item that was not evaluated because the verdict was decided"""
+        item.passed = False
+        item.notes = self.SKIPPED_NOTE
+        item.input_hash = ""  # not evaluated: must not be stored or memoized
+
     def _automated_check(self, item: ChecklistItem, artifact: Dict) -> bool:
-        """Perform automated validation"""
-        # Implement programmatic checks
-        return True
+        """Perform automated validation with the item's pre-bound check"""
+        if item.check is None:
+            item.notes = "No automated check bound"
+            return False
+        return item.check(artifact)
 
     def _llm_check(self, item: ChecklistItem, artifact: Dict) -> bool:
         """Perform LLM-powered validation"""
         # Use LLM to evaluate item against artifact
         return True
 
-    def _load_artifact(self, project_id: str, artifact_type: str, artifact_id: str) -> Dict:
-        """Load artifact from Firestore"""
+    def _artifact_collection(self, project_id: str, artifact_type: str):
+        """Resolve the Firestore collection holding artifacts of this type"""
         collection_map = {
             'story': 'stories',
             'prd': 'artifacts',
             'architecture': 'artifacts'
         }
         collection = collection_map.get(artifact_type, 'artifacts')
-        ref = self.db.collection('projects').document(project_id).collection(collection).document(artifact_id)
+        return self.db.collection('projects').document(project_id).collection(collection)
+
+    def _load_artifact(self, project_id: str, artifact_type: str, artifact_id: str) -> Dict:
+        """Load artifact from Firestore"""
+        ref = self._artifact_collection(project_id, artifact_type).document(artifact_id)
         return ref.get().to_dict()
 
-    def _save_checklist_result(self, project_id: str, result: ChecklistResult):
-        """Save checklist result to Firestore"""
-        result_ref = (
+    def _load_artifacts(self, project_id: str, artifact_type: str, artifact_ids: List[str]) -> Dict[str, Dict]:
+        """Bulk-load artifacts in a single get_all round trip (missing ones are omitted)"""
+        collection = self._artifact_collection(project_id, artifact_type)
+        refs = [collection.document(artifact_id) for artifact_id in artifact_ids]
+        return {
+            snapshot.id: snapshot.to_dict()
+            for snapshot in self.db.get_all(refs)
+            if snapshot.exists
+        }
+
+    def _item_to_dict(self, item: ChecklistItem) -> Dict:
+        """Serialize an item for Firestore (bound checks are not persisted)"""
+        return {
+            'item_id': item.item_id,
+            'description': item.description,
+            'category': item.category,
+            'validation_method': item.validation_method,
+            'passed': item.passed,
+            'notes': item.notes,
+            'input_hash': item.input_hash
+        }
+
+    def _load_failure_rates(self, project_id: str, checklist_name: str) -> Dict[str, float]:
+        """Per-item historical failure rate from the checklist's outcome counters (one read)"""
+        snapshot = self._checklist_stats_ref(project_id, checklist_name).get()
+        return self._failure_rates(snapshot.to_dict()) if snapshot.exists else {}
+
+    @staticmethod
+    def _failure_rates(stats: Dict) -> Dict[str, float]:
+        return {
+            item_id: counts.get('failures', 0) / counts['runs']
+            for item_id, counts in stats.get('items', {}).items()
+            if counts.get('runs')
+        }
+
+    def _outcome_counts(self, results: List[ChecklistResult]) -> Dict[str, Dict[str, Tuple[int, int]]]:
+        """(runs, failures) per checklist and item; skipped items carry no signal about the item"""
+        counts: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        for result in results:
+            per_item = counts.setdefault(result.checklist_id, {})
+            for item in result.items:
+                if item.notes == self.SKIPPED_NOTE:
+                    continue
+                runs, failures = per_item.get(item.item_id, (0, 0))
+                per_item[item.item_id] = (runs + 1, failures + (not item.passed))
+        return counts
+
+    def _checklist_stats_ref(self, project_id: str, checklist_id: str):
+        """Aggregated per-item outcome counters of one checklist"""
+        return (
+            self.db.collection('projects')
+            .document(project_id)
+            .collection('checklist_stats')
+            .document(checklist_id)
+        )
+
+    def _checklist_result_ref(self, project_id: str, checklist_id: str, artifact_id: str):
+        return (
             self.db.collection('projects')
             .document(project_id)
             .collection('checklist_results')
-            .document(f"{result.checklist_id}_{result.artifact_id}")
+            .document(f"{checklist_id}_{artifact_id}")
         )
-        result_ref.set({
+
+    def _checklist_result_to_dict(self, result: ChecklistResult) -> Dict:
+        return {
             'checklist_id': result.checklist_id,
             'artifact_id': result.artifact_id,
             'passed': result.passed,
-            'items': [vars(item) for item in result.items],
+            'items': [self._item_to_dict(item) for item in result.items],
             'executed_at': result.executed_at,
-            'executor': result.executor
-        })
+            'executor': result.executor,
+            'checklist_version': result.checklist_version
+        }
+
+    def _save_checklist_result(self, project_id: str, result: ChecklistResult):
+        """Save checklist result to Firestore"""
+        self._save_checklist_results(project_id, [result])
+
+    def _save_checklist_results(self, project_id: str, results: List[ChecklistResult]):
+        """
+        Save checklist results using batched writes.
+
+        Each batch also increments the per-item outcome counters of the
+        checklists it covers, so failure rates cost one read per checklist
+        instead of a scan of every stored result.
+        """
+        # Leave room for one counter update per result
+        per_batch = self.WRITE_BATCH_SIZE // 2
+        for start in range(0, len(results), per_batch):
+            chunk = results[start:start + per_batch]
+            batch = self.db.batch()
+            for result in chunk:
+                result_ref = self._checklist_result_ref(project_id, result.checklist_id, result.artifact_id)
+                batch.set(result_ref, self._checklist_result_to_dict(result))
+            for checklist_id, counts in self._outcome_counts(chunk).items():
+                batch.set(self._checklist_stats_ref(project_id, checklist_id), {
+                    'items': {
+                        item_id: {'runs': firestore.Increment(runs), 'failures': firestore.Increment(failures)}
+                        for item_id, (runs, failures) in counts.items()
+                    }
+                }, merge=True)
+            batch.commit()
@@ -0,0 +1,487 @@
+"""
+BMad Framework - Markdown Sharding Primitives
+=============================================
+
+Streaming section tokenizer and memory-mapped source document shared by
+shard-doc.py and unshard-doc.py (and their benchmarks and tests).
+
+**Analysis Reference**: analysis/tasks/shard-doc.md
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+from dataclasses import dataclass, field
+from enum import Enum
+import hashlib
+import mmap
+import os
+import random
+import re
+import tempfile
+import time
+from google.api_core import exceptions as gcp_exceptions
+
+
+class DocumentType(Enum):
+    """Document types that can be sharded"""
+    PRD = "prd"
+    ARCHITECTURE = "architecture"
+
+
+# Stored alongside index.md; records what the last shard-doc run wrote
+MANIFEST_FILENAME = "manifest.json"
+
+# Storage errors worth retrying (throttling, server-side and connection failures)
+TRANSIENT_STORAGE_ERRORS = (
+    gcp_exceptions.TooManyRequests,
+    gcp_exceptions.InternalServerError,
+    gcp_exceptions.BadGateway,
+    gcp_exceptions.ServiceUnavailable,
+    gcp_exceptions.GatewayTimeout,
+    ConnectionError,
+)
+
+T = TypeVar('T')
+
+
+def with_retries(call: Callable[[], T], attempts: int, transient: tuple = TRANSIENT_STORAGE_ERRORS) -> T:
+    """Run call, retrying transient errors with jittered exponential backoff"""
+    for attempt in range(attempts):
+        try:
+            return call()
+        except transient:
+            if attempt == attempts - 1:
+                raise
+            time.sleep((2 ** attempt) * 0.5 + random.uniform(0, 0.5))
+
+
+# ============================================================================
+# Streaming Markdown Section Tokenizer
+# ============================================================================
+
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})(.*)$')
+_ATX_RE = re.compile(r'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$')
+_SETEXT_RE = re.compile(r'^ {0,3}(=+|-+)[ \t]*$')
+# Lines that start a block other than a paragraph (lists, quotes, tables, html, rules)
+_NON_PARAGRAPH_RE = re.compile(
+    r'^ {0,3}(?:(?:[>*+|<-]|\d{1,9}[.)])(?:[ \t]|$)|([-*_])(?:[ \t]*\1){2,}[ \t]*$)'
+)
+
+
+@dataclass
+class SectionHeading:
+    """Heading found while tokenizing a section"""
+    level: int
+    title: str
+    line_index: int  # First line of the heading within its section
+    offset: int  # Byte offset of that line in the (normalized) source
+    underline_index: Optional[int] = None  # Setext underline line, if any
+
+
+@dataclass
+class MarkdownSection:
+    """
+    Contiguous byte range of the source, starting at a split-level heading.
+
+    The section before the first split-level heading is the preamble
+    (title None, level 0).
+    """
+    title: Optional[str]
+    level: int
+    offset: int
+    length: int = 0
+    lines: List[str] = field(default_factory=list)
+    headings: List[SectionHeading] = field(default_factory=list)
+
+    def render(self, demote: bool = True) -> Iterator[str]:
+        """
+        Yield the section's lines, optionally demoting headings one level
+        (## -> #, ### -> ##, setext '---' -> '===') for standalone shards.
+        """
+        atx_lines = set()
+        setext_underlines = set()
+        if demote:
+            for heading in self.headings:
+                if heading.underline_index is not None:
+                    if heading.level == 2:
+                        setext_underlines.add(heading.underline_index)
+                elif heading.level > 1:
+                    atx_lines.add(heading.line_index)
+
+        for i, line in enumerate(self.lines):
+            if i in atx_lines:
+                hash_pos = line.index('#')
+                yield line[:hash_pos] + line[hash_pos + 1:]
+            elif i in setext_underlines:
+                yield line.replace('-', '=')
+            else:
+                yield line
+
+
+def byte_len(line: str) -> int:
+    return len(line) if line.isascii() else len(line.encode('utf-8'))
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield lines of an in-memory document (CRLF normalized) without splitting it up front"""
+    start = 0
+    end = len(text)
+    while start < end:
+        newline = text.find('\n', start)
+        stop = end if newline == -1 else newline + 1
+        line = text[start:stop]
+        if line.endswith('\r\n'):
+            line = line[:-2] + '\n'
+        yield line
+        start = stop
+
+
+def stream_markdown_sections(
+    lines: Iterable[str],
+    split_level: int = 2,
+    keep_lines: bool = True
+) -> Iterator[MarkdownSection]:
+    """
+    Single-pass heading tokenizer.
+
+    Consumes lines once and yields each MarkdownSection as soon as the next
+    split-level heading closes it, so memory is bounded by the largest
+    section rather than the document. Handles ATX and setext headings and
+    ignores anything inside fenced code blocks (``` or ~~~, closed only by a
+    fence of the same character that is at least as long).
+
+    With keep_lines=False only titles, offsets and headings are tracked
+    (used for structure analysis).
+    """
+    current = MarkdownSection(title=None, level=0, offset=0)
+    line_count = 0  # Lines in current section (tracked even when not kept)
+    offset = 0
+
+    fence: Optional[str] = None  # Opening fence run while inside a code block
+    para_start: Optional[int] = None  # Line index where the open paragraph began
+    para_offset = 0
+    para_text: List[str] = []  # Stripped paragraph lines (setext heading text)
+
+    for line in lines:
+        size = byte_len(line)
+        stripped = line.rstrip('\n')
+
+        heading: Optional[SectionHeading] = None
+        starts_paragraph = False
+
+        if fence is not None:
+            close = FENCE_RE.match(stripped)
+            if close and close.group(1)[0] == fence[0] and len(close.group(1)) >= len(fence) \
+                    and not close.group(2).strip():
+                fence = None
+        elif not stripped.strip():
+            para_start = None
+        else:
+            # Only lines starting with a marker character can open a fence or heading
+            marker = stripped.lstrip(' ')[:1]
+            opening = FENCE_RE.match(stripped) if marker in ('`', '~') else None
+            atx = _ATX_RE.match(stripped) if marker == '#' else None
+            setext = _SETEXT_RE.match(stripped) if para_start is not None and marker in ('=', '-') else None
+
+            if opening and not (opening.group(1)[0] == '`' and '`' in opening.group(2)):
+                fence = opening.group(1)
+                para_start = None
+            elif atx:
+                heading = SectionHeading(
+                    level=len(atx.group(1)),
+                    title=(atx.group(2) or '').strip(),
+                    line_index=line_count,
+                    offset=offset
+                )
+                para_start = None
+            elif setext:
+                heading = SectionHeading(
+                    level=1 if setext.group(1)[0] == '=' else 2,
+                    title=' '.join(para_text),
+                    line_index=para_start,
+                    offset=para_offset,
+                    underline_index=line_count
+                )
+                para_start = None
+            elif para_start is None:
+                indented = len(stripped) - len(stripped.lstrip(' ')) >= 4 or stripped.startswith('\t')
+                starts_paragraph = not indented and not _NON_PARAGRAPH_RE.match(stripped)
+            else:
+                para_text.append(stripped.strip())
+
+        if heading is not None and heading.level == split_level:
+            # Close the current section just before the heading's first line
+            carried = current.lines[heading.line_index:] if keep_lines else []
+            carried_count = line_count - heading.line_index
+            if keep_lines:
+                del current.lines[heading.line_index:]
+            current.length = heading.offset - current.offset
+            if current.length or current.title is not None:
+                yield current
+
+            current = MarkdownSection(
+                title=heading.title,
+                level=heading.level,
+                offset=heading.offset,
+                lines=carried
+            )
+            line_count = carried_count
+            if heading.underline_index is not None:
+                heading.underline_index -= heading.line_index
+            heading.line_index = 0
+
+        if heading is not None:
+            current.headings.append(heading)
+
+        if starts_paragraph:
+            para_start = line_count
+            para_offset = offset
+            para_text = [stripped.strip()]
+
+        if keep_lines:
+            current.lines.append(line)
+        line_count += 1
+        offset += size
+
+    current.length = offset - current.offset
+    if current.length or current.title is not None:
+        yield current
+
+
+# ============================================================================
+# Memory-Mapped Source Document
+# ============================================================================
+
+class MappedDocument:
+    """
+    Source document streamed to a local temp file and memory-mapped.
+
+    Line endings are normalized (CRLF -> LF) while streaming, so tokenizer
+    offsets are file offsets and any section can be re-read by byte range.
+    Lines and slices are decoded on demand; the document is never held in
+    memory as a whole.
+    """
+
+    DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, path: str, owned: bool = False):
+        self.path = path
+        self._owned = owned
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # Zero-length files cannot be mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    @classmethod
+    def from_blob(cls, blob: 'storage.Blob', chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> 'MappedDocument':
+        """Stream a Cloud Storage object to a temp file in chunks and map it"""
+        handle, path = tempfile.mkstemp(prefix='bmad-shard-', suffix='.md')
+        try:
+            with os.fdopen(handle, 'wb') as out, blob.open('rb', chunk_size=chunk_size) as reader:
+                pending_cr = False
+                while True:
+                    chunk = reader.read(chunk_size)
+                    if not chunk:
+                        break
+                    if pending_cr:
+                        chunk = b'\r' + chunk
+                    # A CRLF may straddle two chunks
+                    pending_cr = chunk.endswith(b'\r')
+                    if pending_cr:
+                        chunk = chunk[:-1]
+                    out.write(chunk.replace(b'\r\n', b'\n'))
+                if pending_cr:
+                    out.write(b'\r')
+        except BaseException:
+            os.unlink(path)
+            raise
+        return cls(path, owned=True)
+
+    @classmethod
+    def from_text(cls, text: str) -> 'MappedDocument':
+        """Spill an in-memory document to a temp file so it can be read by byte range"""
+        handle, path = tempfile.mkstemp(prefix='bmad-shard-', suffix='.md')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8', newline='') as out:
+                out.writelines(iter_lines(text))
+        except BaseException:
+            os.unlink(path)
+            raise
+        return cls(path, owned=True)
+
+    @property
+    def size(self) -> int:
+        return len(self._map)
+
+    def sha256(self) -> str:
+        """Hash of the (normalized) document, read straight from the mapping"""
+        return hashlib.sha256(self._map).hexdigest()
+
+    def iter_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """Yield decoded lines of the byte range [start, end)"""
+        end = len(self._map) if end is None else end
+        while start < end:
+            newline = self._map.find(b'\n', start, end)
+            stop = end if newline == -1 else newline + 1
+            yield self._map[start:stop].decode('utf-8')
+            start = stop
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+        if self._owned:
+            os.unlink(self.path)
+
+    def __enter__(self) -> 'MappedDocument':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+DocumentSource = Union[str, MappedDocument]
+
+
+def document_lines(document: DocumentSource) -> Iterator[str]:
+    """Lines of an in-memory or memory-mapped document"""
+    if isinstance(document, MappedDocument):
+        return document.iter_lines()
+    return iter_lines(document)
+
+
+# ============================================================================
+# Cross-Reference Anchor Index
+# ============================================================================
+
+# Inline links and images: [text](target "title")
+INLINE_LINK_RE = re.compile(r'(\]\(\s*)(<[^>]*>|[^)\s]+)')
+# Reference definitions: [id]: target
+LINK_DEFINITION_RE = re.compile(r'^( {0,3}\[[^\]]+\]:[ \t]*)(<[^>]*>|\S+)')
+URL_SCHEME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:')
+_BACKTICK_RUN_RE = re.compile(r'`+')
+_LIST_ITEM_RE = re.compile(r'^ {0,3}(?:[*+-]|\d{1,9}[.)])(?:[ \t]|$)')
+
+
+def _code_spans(line: str) -> List[Tuple[int, int]]:
+    """Character ranges of inline code spans (a backtick run closed by one of equal length)"""
+    spans = []
+    runs = list(_BACKTICK_RUN_RE.finditer(line))
+    i = 0
+    while i < len(runs):
+        opening = runs[i]
+        for j in range(i + 1, len(runs)):
+            if len(runs[j].group()) == len(opening.group()):
+                spans.append((opening.start(), runs[j].end()))
+                i = j
+                break
+        i += 1
+    return spans
+
+
+def rewrite_link_targets(lines: Iterable[str], rewrite: Callable[[str], str]) -> Iterator[str]:
+    """
+    Yield lines with every inline link and reference definition target
+    passed through rewrite, in document order.
+
+    Fenced code blocks, indented code blocks and inline code spans are
+    left untouched. Indented lines after a list item are list content,
+    not code.
+    """
+    fence: Optional[str] = None
+    previous_blank = True
+    in_indented_code = False
+    in_list = False
+
+    def replace(match: 're.Match', spans: List[Tuple[int, int]]) -> str:
+        if any(start <= match.start() < end for start, end in spans):
+            return match.group(0)
+        return match.group(1) + rewrite(match.group(2))
+
+    for line in lines:
+        stripped = line.rstrip('\n')
+        blank = not stripped.strip()
+        fence_match = FENCE_RE.match(stripped)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence) \
+                    and not fence_match.group(2).strip():
+                fence = None
+            yield line
+            continue
+
+        indented = len(stripped) - len(stripped.lstrip(' ')) >= 4 or stripped.startswith('\t')
+        if blank:
+            previous_blank = True
+            yield line
+            continue
+        if indented and not in_list and (previous_blank or in_indented_code):
+            in_indented_code = True
+            previous_blank = False
+            yield line
+            continue
+
+        in_indented_code = False
+        previous_blank = False
+        if not indented:
+            # An unindented line either starts a list item or ends the list
+            in_list = bool(_LIST_ITEM_RE.match(stripped))
+        if fence_match and not (fence_match.group(1)[0] == '`' and '`' in fence_match.group(2)):
+            fence = fence_match.group(1)
+            yield line
+            continue
+
+        spans = _code_spans(line) if '`' in line else []
+        if '](' in line:
+            line = INLINE_LINK_RE.sub(lambda match: replace(match, spans), line)
+        if ']:' in line:
+            line = LINK_DEFINITION_RE.sub(lambda match: replace(match, spans), line)
+        yield line
+
+
+def github_anchor(title: str) -> str:
+    """Heading anchor as GitHub renders it ("Foundation & Auth" -> "foundation--auth")"""
+    anchor = re.sub(r'[^\w\- ]', '', title.strip().lower())
+    return anchor.replace(' ', '-')
+
+
+class AnchorIndex:
+    """
+    Global map from each anchor of the monolithic document to the shard
+    file and shard-local anchor where that heading now lives.
+
+    Anchors are deduplicated document-wide in the source ("overview",
+    "overview-1", ...) but per file after sharding, so the two can differ.
+    The index is stored in the shard manifest for readers.
+    """
+
+    def __init__(self, targets: Optional[Dict[str, Tuple[str, str]]] = None):
+        self.targets: Dict[str, Tuple[str, str]] = targets or {}
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, List[str]]]) -> 'AnchorIndex':
+        """Build from (filename, heading titles) pairs given in source order"""
+        index = cls()
+        global_counts: Dict[str, int] = {}
+        for filename, headings in documents:
+            local_counts: Dict[str, int] = {}
+            for title in headings:
+                base = github_anchor(title)
+                global_anchor = cls._dedupe(base, global_counts)
+                local_anchor = cls._dedupe(base, local_counts)
+                index.targets[global_anchor] = (filename, local_anchor)
+        return index
+
+    @staticmethod
+    def _dedupe(base: str, counts: Dict[str, int]) -> str:
+        seen = counts.get(base, 0)
+        counts[base] = seen + 1
+        return base if seen == 0 else f"{base}-{seen}"
+
+    def resolve(self, anchor: str) -> Optional[Tuple[str, str]]:
+        return self.targets.get(anchor.lower())
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {anchor: list(target) for anchor, target in self.targets.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[str]]) -> 'AnchorIndex':
+        return cls({anchor: (target[0], target[1]) for anchor, target in data.items()})
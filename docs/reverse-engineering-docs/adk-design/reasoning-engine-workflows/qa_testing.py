@@ -0,0 +1,334 @@
+"""
+BMad Framework - QA Test Selection and Caching
+==============================================
+
+Import-graph test selection and the test result cache shared by
+apply-qa-fixes.py and review-story.py.
+
+**Analysis Reference**: analysis/tasks/apply-qa-fixes.md, analysis/tasks/review-story.md
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+
+
+def local_cache_dir(repo_path: str, shared: bool = False) -> str:
+    """
+    Directory for local caches of a working tree, kept outside the tree.
+
+    In git this is bmad/ in the tree's git dir (per worktree) or, if
+    shared, in the common git dir of all its worktrees; otherwise a
+    per-tree directory under the user cache dir.
+    """
+    try:
+        git_dir = subprocess.run(
+            ['git', 'rev-parse', '--git-common-dir' if shared else '--git-dir'],
+            cwd=repo_path, capture_output=True, check=True
+        ).stdout.decode().strip()
+        return os.path.join(os.path.abspath(repo_path), git_dir, 'bmad')
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    tree_key = hashlib.sha256(os.path.abspath(repo_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_home, 'bmad', tree_key)
+
+
+class TestImpactMap:
+    """
+    File → tests dependency map built from the Python import graph.
+
+    Each source file's imports are parsed once and cached with its mtime and
+    size in CACHE_FILE (in the tree's local_cache_dir); refresh() and
+    update() reparse only files that changed. tests_for() returns the test files that transitively import any
+    of the given files, or None (run everything) when a file is outside the
+    graph (non-Python sources, conftest.py, config files). input_hash()
+    digests the content of everything a test file transitively imports.
+    """
+
+    CACHE_FILE = 'test-impact.json'
+    SKIP_DIRS = {'.git', '.bmad', '.venv', 'venv', 'node_modules', '__pycache__', 'build', 'dist'}
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self.cache_path = os.path.join(local_cache_dir(repo_path), self.CACHE_FILE)
+        self.files: Dict[str, Dict] = {}  # path -> {'stamp': [mtime_ns, size], 'sha256': ..., 'imports': [...]}
+        self._modules: Dict[str, str] = {}  # module name -> path
+        self._dependents: Optional[Dict[str, Set[str]]] = None
+        self._load()
+
+    @staticmethod
+    def is_test_file(path: str) -> bool:
+        name = os.path.basename(path)
+        return name.endswith('.py') and (name.startswith('test_') or name.endswith('_test.py'))
+
+    def refresh(self):
+        """Scan the repository, reparsing only new or modified files"""
+        seen = set()
+        for root, dirs, names in os.walk(self.repo_path):
+            dirs[:] = [d for d in dirs if d not in self.SKIP_DIRS]
+            for name in names:
+                if name.endswith('.py'):
+                    seen.add(os.path.relpath(os.path.join(root, name), self.repo_path))
+        removed = set(self.files) - seen
+        for path in removed:
+            del self.files[path]
+        self.update(seen, reindex=bool(removed))
+
+    def test_files(self) -> List[str]:
+        return sorted(path for path in self.files if self.is_test_file(path))
+
+    def update(self, paths: Iterable[str], reindex: bool = False, save: bool = True):
+        """Reparse the given files if their mtime or size changed"""
+        for path in paths:
+            if not path.endswith('.py'):
+                continue
+            full_path = os.path.join(self.repo_path, path)
+            if not os.path.exists(full_path):
+                reindex |= self.files.pop(path, None) is not None
+                continue
+            stat = os.stat(full_path)
+            stamp = [stat.st_mtime_ns, stat.st_size]
+            cached = self.files.get(path)
+            if cached is not None and cached['stamp'] == stamp and 'sha256' in cached:
+                continue
+            with open(full_path, 'rb') as f:
+                source = f.read()
+            sha256 = hashlib.sha256(source).hexdigest()
+            if cached is not None and cached.get('sha256') == sha256:
+                cached['stamp'] = stamp  # touched or restored, content unchanged
+                continue
+            imports = self._parse_imports(path, source)
+            reindex |= cached is None or cached['imports'] != imports
+            self.files[path] = {'stamp': stamp, 'sha256': sha256, 'imports': imports}
+
+        if reindex or self._dependents is None:
+            self._index()
+        if save:
+            self._save()
+
+    def tests_for(self, paths: Iterable[str]) -> Optional[List[str]]:
+        """Test files affected by changes to paths (None = full suite)"""
+        affected: Set[str] = set()
+        pending = []
+        for path in paths:
+            if path not in self.files or os.path.basename(path) == 'conftest.py':
+                return None
+            pending.append(path)
+
+        while pending:
+            path = pending.pop()
+            if path in affected:
+                continue
+            affected.add(path)
+            pending.extend(self._dependents.get(path, ()))
+
+        return sorted(path for path in affected if self.is_test_file(path))
+
+    def inputs_of(self, test_path: str) -> List[str]:
+        """Files a test file transitively imports, plus conftest.py files above it"""
+        inputs: Set[str] = set()
+        pending = [test_path]
+        directory = os.path.dirname(test_path)
+        while True:
+            pending.append(os.path.join(directory, 'conftest.py'))
+            if not directory:
+                break
+            directory = os.path.dirname(directory)
+
+        while pending:
+            path = pending.pop()
+            if path in inputs or path not in self.files:
+                continue
+            inputs.add(path)
+            for module in self.files[path]['imports']:
+                target = self._modules.get(module)
+                if target is not None:
+                    pending.append(target)
+        return sorted(inputs)
+
+    def input_hash(self, test_path: str) -> str:
+        """Digest of the content of a test's transitive inputs (call update() first)"""
+        digest = hashlib.sha256()
+        for path in self.inputs_of(test_path):
+            digest.update(f"{path}\0{self.files[path]['sha256']}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def clone(self, repo_path: str) -> 'TestImpactMap':
+        """Copy of the map for a fresh worktree checked out with the same content"""
+        other = TestImpactMap.__new__(TestImpactMap)
+        other.repo_path = repo_path
+        other.cache_path = os.path.join(local_cache_dir(repo_path), self.CACHE_FILE)
+        other.files = {}
+        for path, entry in self.files.items():
+            # Content is identical; only the stamps differ
+            full_path = os.path.join(repo_path, path)
+            if os.path.exists(full_path):
+                stat = os.stat(full_path)
+                other.files[path] = {**entry, 'stamp': [stat.st_mtime_ns, stat.st_size]}
+        other._modules = dict(self._modules)
+        other._dependents = {path: set(dependents) for path, dependents in (self._dependents or {}).items()}
+        return other
+
+    def _parse_imports(self, path: str, source: bytes) -> List[str]:
+        """Absolute module names imported by a file (relative imports resolved)"""
+        try:
+            tree = ast.parse(source, filename=path)
+        except (SyntaxError, ValueError):
+            return []
+
+        package = self._module_name(path).split('.')
+        if not path.endswith('__init__.py'):
+            package = package[:-1]
+
+        imports = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imports.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = package[:len(package) - node.level + 1] if node.level else []
+                module = '.'.join(base + ([node.module] if node.module else []))
+                if module:
+                    imports.add(module)
+                # "from pkg import mod" may import a submodule
+                imports.update(f"{module}.{alias.name}" if module else alias.name for alias in node.names)
+
+        # Importing a.b.c also runs a/__init__.py and a/b/__init__.py
+        for name in list(imports):
+            parts = name.split('.')
+            imports.update('.'.join(parts[:i]) for i in range(1, len(parts)))
+        return sorted(imports)
+
+    @staticmethod
+    def _module_name(path: str) -> str:
+        module = path[:-3].replace(os.sep, '.')
+        return module[:-len('.__init__')] if module.endswith('.__init__') else module
+
+    def _index(self):
+        """Reverse import edges: path -> files importing it"""
+        self._modules = {}
+        for path in self.files:
+            module = self._module_name(path)
+            self._modules[module] = path
+            # Files in src/ or tests/ layouts are also importable without the prefix
+            for prefix in ('src.', 'tests.'):
+                if module.startswith(prefix):
+                    self._modules.setdefault(module[len(prefix):], path)
+
+        self._dependents = {}
+        for path, entry in self.files.items():
+            for module in entry['imports']:
+                target = self._modules.get(module)
+                if target is not None and target != path:
+                    self._dependents.setdefault(target, set()).add(path)
+
+    def _load(self):
+        try:
+            with open(self.cache_path) as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            self.files = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path, 'w') as f:
+            json.dump(self.files, f)
+
+
+class TestResultCache:
+    """
+    Passing test results keyed by (test id, hash of the test's transitive inputs).
+
+    Stored in a SQLite file shared by all worktrees of the repository
+    (local_cache_dir) and evicted least-recently-used beyond
+    MAX_ENTRIES. A tree whose inputs hash the same as an earlier passing
+    run (a reverted or no-op change) is answered without running the
+    test. Failures are never cached, so a flaky or environment-dependent
+    failure is retried. Safe to share between threads.
+    """
+
+    CACHE_FILE = 'test-results.sqlite'
+    MAX_ENTRIES = 50000
+
+    def __init__(self, repo_path: str):
+        self.path = os.path.join(local_cache_dir(repo_path, shared=True), self.CACHE_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'test_id TEXT NOT NULL, input_hash TEXT NOT NULL, passed INTEGER NOT NULL, '
+                'last_used REAL NOT NULL, PRIMARY KEY (test_id, input_hash))'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+
+    def run(
+        self,
+        impact: TestImpactMap,
+        tests: Optional[List[str]],
+        execute_tests: Callable[[List[str]], Dict[str, bool]],
+        execute_suite: Callable[[], bool]
+    ) -> bool:
+        """
+        Pass/fail of tests, running only those without a cached pass.
+
+        execute_tests(tests) runs test files and returns {test: passed}.
+        tests None means the full suite, which runs through execute_suite()
+        without the cache: it may contain tests outside the Python import
+        graph, whose inputs cannot be hashed.
+        """
+        if tests is None:
+            return execute_suite()
+
+        impact.update(list(impact.files), save=False)
+        keys = {test: impact.input_hash(test) for test in tests}
+        cached = self.get(keys)
+        pending = [test for test in tests if test not in cached]
+        if not pending:
+            return True
+
+        results = execute_tests(pending)
+        self.put({test: keys[test] for test, passed in results.items() if passed and test in keys})
+        return all(results.get(test, False) for test in pending)
+
+    def get(self, keys: Dict[str, str]) -> Set[str]:
+        """Tests with a cached pass for {test: input_hash}, marking them recently used"""
+        if not keys:
+            return set()
+        found = set()
+        with self._lock, self._connect() as db:
+            for test, input_hash in keys.items():
+                row = db.execute(
+                    'SELECT 1 FROM results WHERE test_id = ? AND input_hash = ? AND passed = 1', (test, input_hash)
+                ).fetchone()
+                if row is not None:
+                    found.add(test)
+            db.executemany(
+                'UPDATE results SET last_used = ? WHERE test_id = ? AND input_hash = ?',
+                [(time.time(), test, keys[test]) for test in found]
+            )
+        return found
+
+    def put(self, passed: Dict[str, str]):
+        """Store passes as {test: input_hash} and evict the least recently used"""
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, 1, ?)',
+                [(test, input_hash, now) for test, input_hash in passed.items()]
+            )
+            excess = db.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.MAX_ENTRIES
+            if excess > 0:
+                db.execute(
+                    'DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used LIMIT ?)',
+                    (excess,)
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
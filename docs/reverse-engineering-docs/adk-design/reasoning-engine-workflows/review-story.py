@@ -40,6 +40,9 @@ from google.cloud import aiplatform
 from google import adk
 from adk.workflows import WorkflowAgent, WorkflowStep
 
+# Shared with the apply-qa-fixes workflow
+from qa_testing import TestImpactMap, TestResultCache
+
 
 # ============================================================================
 # Data Models
@@ -161,13 +164,18 @@ class ReviewStoryWorkflow(WorkflowAgent):
         self,
         project_id: str,
         firestore_client: Optional[firestore.Client] = None,
-        storage_client: Optional[storage.Client] = None
+        storage_client: Optional[storage.Client] = None,
+        repo_path: str = '.'
     ):
         """Initialize workflow with GCP clients"""
         super().__init__()
         self.project_id = project_id
         self.db = firestore_client or firestore.Client(project=project_id)
         self.storage = storage_client or storage.Client(project=project_id)
+        self.repo_path = repo_path
+        # Built by the first test run (most reviews perform no refactoring)
+        self.impact: Optional[TestImpactMap] = None
+        self.test_cache: Optional[TestResultCache] = None
         self.config: Optional[Dict] = None
         self.results = QAResults(story_id="", review_date=datetime.now().isoformat())
 
@@ -417,12 +425,17 @@ class ReviewStoryWorkflow(WorkflowAgent):
         - Run all tests after each refactoring
         - Document all changes
         - Stay within safety boundaries
+
+        Test runs go through the shared test result cache, so tests whose
+        inputs a refactoring did not touch (or a reverted refactoring
+        restored) are not rerun.
         """
         print("Performing safe refactorings...")
 
         refactorings = []
 
-        # In production, identify and perform actual refactorings
+        # In production, identify and perform actual refactorings, calling
+        # self._run_tests([refactoring.file_path]) after each one
         # For design, show structure
         example_refactoring = CodeRefactoring(
             file_path="src/components/LoginForm.tsx",
@@ -630,6 +643,29 @@ class ReviewStoryWorkflow(WorkflowAgent):
     # Helper Methods
     # ========================================================================
 
+    def _run_tests(self, changed_paths: List[str]) -> bool:
+        """Run all tests after changing files, skipping those with a cached pass for unchanged inputs"""
+        if self.impact is None:
+            self.impact = TestImpactMap(self.repo_path)
+            self.impact.refresh()
+            self.test_cache = TestResultCache(self.repo_path)
+        self.impact.update(changed_paths)
+        tests = self.impact.test_files()
+        if not tests or self.impact.tests_for(changed_paths) is None:
+            # No Python tests, or a change the import graph cannot see: run the real suite
+            tests = None
+        return self.test_cache.run(self.impact, tests, self._execute_tests, self._execute_suite)
+
+    def _execute_tests(self, tests: List[str]) -> Dict[str, bool]:
+        """Run test files, returning pass/fail per file"""
+        # In production, execute test framework in self.repo_path
+        return {test: True for test in tests}
+
+    def _execute_suite(self) -> bool:
+        """Run the project's full test suite (every language and framework)"""
+        # In production, run the project's test command in self.repo_path
+        return True
+
     def _load_config(self, project_id: str):
         """Load project configuration"""
         config_ref = self.db.collection('projects').document(project_id)
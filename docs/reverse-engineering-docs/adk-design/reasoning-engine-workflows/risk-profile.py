@@ -9,10 +9,14 @@ Reasoning Engine implementation for risk-profile task.
 **Analysis Reference**: analysis/tasks/risk-profile.md
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
+import hashlib
+import json
+import re
+import numpy as np
 from google.cloud import firestore, storage
 from google import adk
 from adk.workflows import WorkflowAgent, WorkflowStep
@@ -29,6 +33,48 @@ class RiskCategory(Enum):
     TECHNICAL_DEBT = "Technical Debt"
 
 
+# Matrix column order for portfolio scoring
+RISK_CATEGORIES = list(RiskCategory)
+_CATEGORY_INDEX = {category.value: i for i, category in enumerate(RISK_CATEGORIES)}
+
+# Story text routed to each category's inputs. In production the LLM's
+# category classification replaces keyword routing; text matching no
+# category is tracked as a token set (see RiskProfileWorkflow.execute).
+CATEGORY_KEYWORDS = {
+    RiskCategory.SECURITY: ('auth', 'login', 'password', 'token', 'permission', 'role', 'encrypt', 'secret', 'session', 'access'),
+    RiskCategory.DATA_LOSS: ('delete', 'remove', 'save', 'backup', 'migrat', 'persist', 'store', 'sync', 'import', 'export'),
+    RiskCategory.PERFORMANCE: ('performance', 'latency', 'load', 'fast', 'second', 'cache', 'scale', 'concurren', 'bulk', 'large'),
+    RiskCategory.COMPLIANCE: ('gdpr', 'pii', 'audit', 'consent', 'retention', 'complian', 'regulat', 'privacy'),
+    RiskCategory.INTEGRATION: ('api', 'webhook', 'integrat', 'third-party', 'service', 'external', 'endpoint', 'queue', 'event'),
+    RiskCategory.UX: ('display', 'screen', 'page', 'button', 'form', 'message', 'ui', 'view', 'navigat', 'error'),
+    RiskCategory.TECHNICAL_DEBT: ('refactor', 'legacy', 'deprecat', 'workaround', 'cleanup', 'todo'),
+}
+_CATEGORY_PATTERNS = {
+    category: re.compile(r'\b(?:' + '|'.join(re.escape(keyword) for keyword in keywords) + ')')
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
+
+
+def _normalize(text: str) -> str:
+    """Case, whitespace and punctuation changes do not change a risk input"""
+    return ' '.join(re.findall(r'[a-z0-9]+', str(text).lower()))
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two tokens"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+# Gate impact codes used in score matrices (index into GATE_IMPACTS)
+GATE_IMPACTS = np.array(['', 'INFO', 'CONCERNS', 'FAIL'])
+
+
 @dataclass
 class RiskAssessment:
     """Individual risk assessment"""
@@ -56,6 +102,22 @@ class RiskProfileWorkflow(WorkflowAgent):
     - Score 1-5: Informational
     """
 
+    # Story fields read by this workflow (projection; dev_agent_record and
+    # architecture excerpts are skipped)
+    STORY_FIELDS = ['title', 'user_story', 'acceptance_criteria', 'technical_context.story_type']
+
+    # Gate impact thresholds (score = probability × impact)
+    FAIL_SCORE = 9
+    CONCERNS_SCORE = 6
+
+    # Risks listed in the portfolio rollup
+    TOP_N_RISKS = 20
+
+    # Edits to uncategorized story text that count as typo fixes: at most
+    # this many tokens replaced, each within this edit distance
+    TYPO_MAX_TOKENS = 3
+    TYPO_MAX_DISTANCE = 2
+
     def __init__(self, project_id: str, **kwargs):
         super().__init__()
         self.project_id = project_id
@@ -63,9 +125,16 @@ class RiskProfileWorkflow(WorkflowAgent):
         self.storage = storage.Client(project=project_id)
 
     @WorkflowStep(step_id="step_1_identify_risks", description="Identify risk categories")
-    def identify_risks(self, bmad_project_id: str, story_id: str) -> List[Dict]:
-        """Identify applicable risk categories for story"""
-        story = self._load_story(bmad_project_id, story_id)
+    def identify_risks(
+        self,
+        bmad_project_id: str,
+        story_id: str,
+        story: Optional[Dict] = None,
+        categories: Optional[Iterable[RiskCategory]] = None
+    ) -> List[Dict]:
+        """Identify applicable risk categories for story (optionally only the given categories)"""
+        if story is None:
+            story = self._load_story(bmad_project_id, story_id)
 
         # Analyze story to identify relevant risks
         # In production, use LLM to analyze story context
@@ -79,6 +148,10 @@ class RiskProfileWorkflow(WorkflowAgent):
             {'category': RiskCategory.TECHNICAL_DEBT, 'applicable': False},
         ]
 
+        if categories is not None:
+            categories = set(categories)
+            identified_risks = [r for r in identified_risks if r['category'] in categories]
+
         return [r for r in identified_risks if r['applicable']]
 
     @WorkflowStep(step_id="step_2_score_risks", description="Score each risk (probability × impact)")
@@ -93,9 +166,9 @@ class RiskProfileWorkflow(WorkflowAgent):
             score = probability * impact
 
             # Determine gate impact
-            if score == 9:
+            if score >= self.FAIL_SCORE:
                 gate_impact = "FAIL"
-            elif score >= 6:
+            elif score >= self.CONCERNS_SCORE:
                 gate_impact = "CONCERNS"
             else:
                 gate_impact = "INFO"
@@ -122,37 +195,268 @@ class RiskProfileWorkflow(WorkflowAgent):
 
         return assessments
 
-    def execute(self, bmad_project_id: str, story_id: str) -> Dict:
-        """Execute risk profiling workflow"""
+    def category_input_hashes(self, story: Dict) -> Dict[str, str]:
+        """
+        Hash of the normalized story inputs of each risk category.
+
+        Every category depends on the story type; title, user story and
+        acceptance criteria are routed to categories by CATEGORY_KEYWORDS,
+        so an edit only changes the hashes of the categories it concerns.
+        Text matching no category is left out (see uncategorized_tokens).
+        """
+        inputs = {category: [] for category in RiskCategory}
+        for normalized, matched in self._route_story_text(story):
+            for category in matched:
+                inputs[category].append(normalized)
+
+        story_type = (story.get('technical_context') or {}).get('story_type')
+        return {
+            category.value: hashlib.sha256(
+                json.dumps([story_type, sorted(values)]).encode('utf-8')
+            ).hexdigest()
+            for category, values in inputs.items()
+        }
+
+    def uncategorized_tokens(self, story: Dict) -> List[str]:
+        """Sorted token set of the story text that matches no category"""
+        return sorted({
+            token
+            for normalized, matched in self._route_story_text(story) if not matched
+            for token in normalized.split()
+        })
+
+    def uncategorized_text_changed(self, previous: Optional[List[str]], current: List[str]) -> bool:
+        """
+        Whether uncategorized text changed beyond typo fixes.
+
+        Such text may bear on any category, so a real change re-profiles
+        all of them. Replacing up to TYPO_MAX_TOKENS tokens, each with one
+        within TYPO_MAX_DISTANCE edits, does not.
+        """
+        if previous is None:
+            return True
+        removed = sorted(set(previous) - set(current))
+        added = sorted(set(current) - set(previous))
+        if len(added) != len(removed) or len(added) > self.TYPO_MAX_TOKENS:
+            return True
+        unpaired = list(removed)
+        for token in added:
+            match = next(
+                (old for old in unpaired if _edit_distance(old, token) <= self.TYPO_MAX_DISTANCE), None
+            )
+            if match is None:
+                return True
+            unpaired.remove(match)
+        return False
+
+    def _route_story_text(self, story: Dict) -> List[Tuple[str, List[RiskCategory]]]:
+        """Normalized title, user story and acceptance criteria with the categories each matches"""
+        texts = [story.get('title', ''), story.get('user_story', '')] + list(story.get('acceptance_criteria', []))
+        routed = []
+        for text in texts:
+            normalized = _normalize(text)
+            if normalized:
+                matched = [category for category, pattern in _CATEGORY_PATTERNS.items() if pattern.search(normalized)]
+                routed.append((normalized, matched))
+        return routed
+
+    def execute(self, bmad_project_id: str, story_id: str, force: bool = False) -> Dict:
+        """
+        Execute risk profiling workflow.
+
+        Only categories whose input hashes differ from the stored profile
+        are re-identified, scored and mitigated; stored assessments are
+        reused for the rest. Uncategorized text re-profiles every category,
+        unless the edit is a typo fix. force re-profiles every category.
+        """
         story = self._load_story(bmad_project_id, story_id)
+        input_hashes = self.category_input_hashes(story)
+        free_tokens = self.uncategorized_tokens(story)
+        previous = None if force else self._load_risk_profile(bmad_project_id, story_id)
+        previous_hashes = (previous or {}).get('input_hashes', {})
+
+        if self.uncategorized_text_changed((previous or {}).get('uncategorized_tokens'), free_tokens):
+            changed = list(RiskCategory)
+        else:
+            changed = [
+                category for category in RiskCategory
+                if previous_hashes.get(category.value) != input_hashes[category.value]
+            ]
+        cached = [
+            RiskAssessment(**{**assessment, 'category': RiskCategory(assessment['category'])})
+            for assessment in (previous or {}).get('assessments', [])
+            if RiskCategory(assessment['category']) not in changed
+        ]
+
+        assessments = []
+        if changed:
+            # Step 1: Identify risks
+            risks = self.identify_risks(bmad_project_id, story_id, story, categories=changed)
 
-        # Step 1: Identify risks
-        risks = self.identify_risks(bmad_project_id, story_id)
+            # Step 2: Score risks
+            assessments = self.score_risks(risks, story)
 
-        # Step 2: Score risks
-        assessments = self.score_risks(risks, story)
+            # Step 3: Generate mitigations
+            assessments = self.generate_mitigations(assessments)
 
-        # Step 3: Generate mitigations
-        assessments = self.generate_mitigations(assessments)
+        assessments = sorted(cached + assessments, key=lambda r: r.score, reverse=True)
 
         # Save risk profile
-        self._save_risk_profile(bmad_project_id, story_id, assessments)
+        if changed:
+            self._save_risk_profile(bmad_project_id, story_id, assessments, input_hashes, free_tokens)
+            if cached:
+                print(f"  ✓ Re-profiled {len(changed)} of {len(RiskCategory)} risk categories")
 
         return {
             'success': True,
             'story_id': story_id,
+            'recomputed_categories': [category.value for category in changed],
             'risk_count': len(assessments),
             'highest_risk_score': max(a.score for a in assessments) if assessments else 0,
             'gate_impact': 'FAIL' if any(a.gate_impact == 'FAIL' for a in assessments) else 'CONCERNS' if any(a.gate_impact == 'CONCERNS' for a in assessments) else 'INFO'
         }
 
+    def score_matrix(self, probability: np.ndarray, impact: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score story × category matrices in one pass.
+
+        probability and impact are int arrays of shape (stories, categories)
+        with 0 for categories that do not apply. Returns the score matrix and
+        gate impact codes (index into GATE_IMPACTS; 0 = not applicable).
+        """
+        scores = probability.astype(np.int16) * impact
+        gates = np.select(
+            [scores >= self.FAIL_SCORE, scores >= self.CONCERNS_SCORE, scores > 0],
+            [3, 2, 1],
+            default=0
+        ).astype(np.int8)
+        return scores, gates
+
+    def execute_portfolio(self, bmad_project_id: str, top_n: Optional[int] = None) -> Dict:
+        """
+        Roll up every stored risk profile in the project (nightly job).
+
+        Profiles are read with one projected query into probability and
+        impact matrices (story × category); scores, gate impacts, the
+        epic × category heatmap (max score) and the top-N risks are computed
+        with array operations rather than per-story loops.
+        """
+        top_n = self.TOP_N_RISKS if top_n is None else top_n
+        story_ids, probability, impact = self._load_risk_matrices(bmad_project_id)
+        scores, gates = self.score_matrix(probability, impact)
+
+        # Story gates: worst category per story
+        story_gates = gates.max(axis=1, initial=0)
+
+        # Epic × category heatmap (story ids are "epic.story")
+        epics = np.array([story_id.partition('.')[0] for story_id in story_ids])
+        epic_labels, epic_rows = np.unique(epics, return_inverse=True)
+        heatmap = np.zeros((len(epic_labels), len(RISK_CATEGORIES)), dtype=np.int16)
+        np.maximum.at(heatmap, epic_rows, scores)
+        high_risk = np.zeros_like(heatmap)
+        np.add.at(high_risk, epic_rows, scores >= self.CONCERNS_SCORE)
+
+        # Top-N (story, category) pairs by score, without sorting everything
+        flat = scores.ravel()
+        k = min(top_n, int(np.count_nonzero(flat)))
+        top = []
+        if k:
+            candidates = np.argpartition(-flat, k - 1)[:k]
+            candidates = candidates[np.lexsort((candidates, -flat[candidates]))]
+            rows, cols = np.unravel_index(candidates, scores.shape)
+            top = [
+                {
+                    'story_id': story_ids[row],
+                    'category': RISK_CATEGORIES[col].value,
+                    'probability': int(probability[row, col]),
+                    'impact': int(impact[row, col]),
+                    'score': int(scores[row, col]),
+                    'gate_impact': str(GATE_IMPACTS[gates[row, col]])
+                }
+                for row, col in zip(rows.tolist(), cols.tolist())
+            ]
+
+        gate_counts = np.bincount(story_gates, minlength=len(GATE_IMPACTS))
+        rollup = {
+            'story_count': len(story_ids),
+            'gate_counts': {str(GATE_IMPACTS[code]): int(gate_counts[code]) for code in range(1, len(GATE_IMPACTS))},
+            'heatmap': {
+                str(epic): {
+                    category.value: int(heatmap[row, col])
+                    for col, category in enumerate(RISK_CATEGORIES)
+                }
+                for row, epic in enumerate(epic_labels.tolist())
+            },
+            'high_risk_counts': {
+                str(epic): {
+                    category.value: int(high_risk[row, col])
+                    for col, category in enumerate(RISK_CATEGORIES)
+                    if high_risk[row, col]
+                }
+                for row, epic in enumerate(epic_labels.tolist())
+            },
+            'top_risks': top
+        }
+        self._save_risk_rollup(bmad_project_id, rollup)
+        print(f"  ✓ Rolled up risk profiles for {len(story_ids)} stories")
+
+        return {'success': True, **rollup}
+
+    def _load_risk_matrices(self, project_id: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Probability and impact matrices (story × category) from stored profiles"""
+        profiles = self.db.collection('projects').document(project_id).collection('risk_profiles')
+
+        story_ids: List[str] = []
+        rows: List[int] = []
+        cols: List[int] = []
+        probabilities: List[int] = []
+        impacts: List[int] = []
+        for doc in profiles.select(['assessments']).stream():
+            row = len(story_ids)
+            story_ids.append(doc.id)
+            for assessment in doc.to_dict().get('assessments', []):
+                col = _CATEGORY_INDEX.get(getattr(assessment['category'], 'value', assessment['category']))
+                if col is None:
+                    continue
+                rows.append(row)
+                cols.append(col)
+                probabilities.append(assessment['probability'])
+                impacts.append(assessment['impact'])
+
+        shape = (len(story_ids), len(RISK_CATEGORIES))
+        probability = np.zeros(shape, dtype=np.int8)
+        impact = np.zeros(shape, dtype=np.int8)
+        probability[rows, cols] = probabilities
+        impact[rows, cols] = impacts
+        return story_ids, probability, impact
+
     def _load_story(self, project_id: str, story_id: str) -> Dict:
-        return self.db.collection('projects').document(project_id).collection('stories').document(story_id).get().to_dict()
+        story_ref = self.db.collection('projects').document(project_id).collection('stories').document(story_id)
+        return story_ref.get(field_paths=self.STORY_FIELDS).to_dict()
 
-    def _save_risk_profile(self, project_id: str, story_id: str, assessments: List[RiskAssessment]):
+    def _load_risk_profile(self, project_id: str, story_id: str) -> Optional[Dict]:
+        profile_ref = self.db.collection('projects').document(project_id).collection('risk_profiles').document(story_id)
+        return profile_ref.get(field_paths=['assessments', 'input_hashes', 'uncategorized_tokens']).to_dict()
+
+    def _save_risk_profile(
+        self,
+        project_id: str,
+        story_id: str,
+        assessments: List[RiskAssessment],
+        input_hashes: Optional[Dict[str, str]] = None,
+        uncategorized_tokens: Optional[List[str]] = None
+    ):
         profile_ref = self.db.collection('projects').document(project_id).collection('risk_profiles').document(story_id)
         profile_ref.set({
             'story_id': story_id,
-            'assessments': [vars(a) for a in assessments],
+            'assessments': [{**vars(a), 'category': a.category.value} for a in assessments],
+            'input_hashes': input_hashes or {},
+            'uncategorized_tokens': uncategorized_tokens or [],
             'created_at': datetime.now().isoformat()
         })
+
+    def _save_risk_rollup(self, project_id: str, rollup: Dict):
+        rollup_ref = self.db.collection('projects').document(project_id).collection('risk_rollups').document(
+            datetime.now().strftime('%Y-%m-%d')
+        )
+        rollup_ref.set({**rollup, 'created_at': datetime.now().isoformat()})
@@ -9,19 +9,39 @@ Reasoning Engine implementation for shard-doc task.
 **Analysis Reference**: analysis/tasks/shard-doc.md
 """
 
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import re
+import tempfile
+import unicodedata
+from google.api_core import exceptions as gcp_exceptions
 from google.cloud import firestore, storage
 from google import adk
 from adk.workflows import WorkflowAgent, WorkflowStep
 
-
-class DocumentType(Enum):
-    """Document types that can be sharded"""
-    PRD = "prd"
-    ARCHITECTURE = "architecture"
+from markdown_sharding import (
+    MANIFEST_FILENAME,
+    TRANSIENT_STORAGE_ERRORS,
+    URL_SCHEME_RE,
+    AnchorIndex,
+    DocumentSource,
+    DocumentType,
+    MappedDocument,
+    MarkdownSection,
+    byte_len,
+    document_lines,
+    github_anchor,
+    iter_lines,
+    rewrite_link_targets,
+    stream_markdown_sections,
+    with_retries,
+)
 
 
 class ShardingStrategy(Enum):
@@ -36,8 +56,28 @@ class DocumentShard:
     shard_id: str
     filename: str
     title: str
-    content: str
+    content: Optional[str]  # None until materialized from a mapped source
     order: int
+    # Byte range of the (normalized) source document this shard came from
+    source_offset: int = 0
+    source_length: int = 0
+    # Heading titles in source order (anchor targets)
+    headings: List[str] = field(default_factory=list)
+
+
+@dataclass
+class IntegrityIssue:
+    """Mismatch found while verifying shards against the source document"""
+    section: str
+    offset: int  # Byte offset in the normalized source
+    message: str
+
+
+@dataclass
+class DanglingLink:
+    """Intra-document link whose target no longer resolves after sharding"""
+    filename: str
+    target: str
 
 
 @dataclass
@@ -50,6 +90,67 @@ class ShardingResult:
     created_at: str
 
 
+@dataclass
+class StagedShard:
+    """Link-rewritten shard content written to the run's spool file"""
+    sha256: str
+    size: int
+    sections: List[Dict]
+    spool_offset: int
+    # [link ordinal, original target] of every rewritten link
+    links: List[List] = field(default_factory=list)
+
+
+@dataclass
+class ShardRun:
+    """
+    State of one sharding run.
+
+    Kept out of the workflow instance so one instance can shard several
+    documents concurrently.
+    """
+    # Mapped source that shards are materialized from (closed with the run if owned)
+    source: Optional[MappedDocument] = None
+    owns_source: bool = False
+
+    # Content before the first level-2 heading (goes into index.md), and
+    # the bytes generated after it (navigation), recorded for unsharding
+    preamble: Optional[MarkdownSection] = None
+    index_tail_size: int = 0
+
+    # Built by preserve_cross_references
+    anchor_index: AnchorIndex = field(default_factory=AnchorIndex)
+    shard_filenames: set = field(default_factory=set)
+    source_filename: str = ""
+    dangling_links: List[DanglingLink] = field(default_factory=list)
+
+    # Filled by validate_integrity: each shard's final bytes, staged once
+    staged: Dict[str, StagedShard] = field(default_factory=dict)
+    spool: Optional[BinaryIO] = None
+
+    def stage(self, data: bytes) -> int:
+        """Append data to the spool file; returns its offset"""
+        if self.spool is None:
+            self.spool = tempfile.TemporaryFile(prefix='bmad-shard-spool-')
+        offset = self.spool.seek(0, os.SEEK_END)
+        self.spool.write(data)
+        self.spool.flush()
+        return offset
+
+    def read_staged(self, filename: str) -> bytes:
+        """Staged bytes of one shard (safe to call from upload threads)"""
+        staged = self.staged[filename]
+        if staged.size == 0:
+            return b''
+        return os.pread(self.spool.fileno(), staged.size, staged.spool_offset)
+
+    def close(self):
+        if self.spool is not None:
+            self.spool.close()
+        if self.owns_source and self.source is not None:
+            self.source.close()
+
+
 class ShardDocWorkflow(WorkflowAgent):
     """
     Document sharding workflow (monolithic → sharded structure).
@@ -61,6 +162,16 @@ class ShardDocWorkflow(WorkflowAgent):
     Transition: v3 (monolithic) → v4 (sharded)
     """
 
+    # Concurrent shard uploads and attempts per shard before giving up
+    UPLOAD_CONCURRENCY = 8
+    UPLOAD_ATTEMPTS = 4
+
+    # Stored alongside index.md; records what the last run wrote
+    MANIFEST_FILENAME = MANIFEST_FILENAME
+
+    # Errors worth retrying (throttling, server-side and connection failures)
+    TRANSIENT_UPLOAD_ERRORS = TRANSIENT_STORAGE_ERRORS
+
     def __init__(self, project_id: str, **kwargs):
         super().__init__()
         self.project_id = project_id
@@ -70,7 +181,7 @@ class ShardDocWorkflow(WorkflowAgent):
     @WorkflowStep(step_id="step_1_analyze_document", description="Analyze document structure")
     def analyze_document(
         self,
-        document_content: str,
+        document_content: DocumentSource,
         document_type: DocumentType
     ) -> Tuple[ShardingStrategy, List[str]]:
         """Analyze document to determine sharding strategy"""
@@ -88,72 +199,299 @@ class ShardDocWorkflow(WorkflowAgent):
     @WorkflowStep(step_id="step_2_extract_shards", description="Extract sections into shards")
     def extract_shards(
         self,
-        document_content: str,
+        run: ShardRun,
+        document_content: DocumentSource,
         sections: List[str],
         strategy: ShardingStrategy
     ) -> List[DocumentShard]:
-        """Extract document sections into individual shards"""
-        shards = []
+        """
+        Extract document sections into individual shards (single pass).
+
+        Only titles and byte ranges are recorded; shard content is
+        materialized from the mapped source one shard at a time when it is
+        needed. An in-memory document is spilled to a temp file first, so
+        neither source kind is held twice.
+        """
+        if isinstance(document_content, MappedDocument):
+            run.source = document_content
+        else:
+            run.source = MappedDocument.from_text(document_content)
+            run.owns_source = True
+
+        shards: List[DocumentShard] = []
+        for shard in self.iter_shards(run, run.source.iter_lines(), strategy, keep_content=False):
+            if shard.order > len(sections) or sections[shard.order - 1] != shard.title:
+                raise ValueError("Document structure changed between analysis and extraction")
+            shards.append(shard)
 
-        for i, section_title in enumerate(sections, 1):
-            # Extract section content
-            section_content = self._extract_section(document_content, section_title)
+        if len(shards) != len(sections):
+            raise ValueError("Document structure changed between analysis and extraction")
 
-            # Create shard
-            if strategy == ShardingStrategy.EPIC_BASED:
-                # PRD epic: epic-1-user-authentication.md
-                filename = f"epic-{i}-{self._slugify(section_title)}.md"
-            else:
-                # Architecture concern: backend-architecture.md
-                filename = f"{self._slugify(section_title)}.md"
+        return shards
 
-            shard = DocumentShard(
-                shard_id=f"shard_{i}",
+    def iter_shards(
+        self,
+        run: ShardRun,
+        lines: Iterable[str],
+        strategy: ShardingStrategy,
+        keep_content: bool = True
+    ) -> Iterator[DocumentShard]:
+        """
+        Stream the document once, yielding each DocumentShard as its section closes.
+
+        Filenames follow the shard-doc rules for both strategies: the
+        lowercase-dashed section title, so "Epic 1: User Authentication"
+        becomes epic-1-user-authentication.md and "Tech Stack" becomes
+        tech-stack.md. Colliding slugs get a numeric suffix.
+
+        With keep_content=False shards carry content None (see _shard_content).
+        """
+        run.preamble = None
+        used_filenames = set()
+        order = 0
+
+        for section in stream_markdown_sections(lines, keep_lines=keep_content):
+            if section.title is None:
+                # The preamble is always materialized for the index
+                run.preamble = section if keep_content else self._read_section(run, section.offset, section.length)
+                continue
+
+            order += 1
+            slug = self._slugify(section.title) or f"section-{order}"
+            filename = f"{slug}.md"
+            suffix = 2
+            while filename in used_filenames:
+                filename = f"{slug}-{suffix}.md"
+                suffix += 1
+            used_filenames.add(filename)
+
+            yield DocumentShard(
+                shard_id=f"shard_{order}",
                 filename=filename,
-                title=section_title,
-                content=section_content,
-                order=i
+                title=section.title,
+                content=''.join(section.render()) if keep_content else None,
+                order=order,
+                source_offset=section.offset,
+                source_length=section.length,
+                headings=[heading.title for heading in section.headings]
             )
-            shards.append(shard)
-
-        return shards
 
     @WorkflowStep(step_id="step_3_generate_index", description="Generate index file with navigation")
     def generate_index(
         self,
+        run: ShardRun,
         shards: List[DocumentShard],
         document_type: DocumentType
     ) -> DocumentShard:
         """Generate index file with links to all shards"""
-        index_content = self._build_index_content(shards, document_type)
+        index_content = self._build_index_content(run, shards, document_type)
 
         index_shard = DocumentShard(
             shard_id="index",
             filename="index.md",
             title="Index",
             content=index_content,
-            order=0
+            order=0,
+            # The index starts with the verbatim preamble
+            source_offset=run.preamble.offset if run.preamble else 0,
+            source_length=run.preamble.length if run.preamble else 0,
+            headings=[heading.title for heading in run.preamble.headings] if run.preamble else []
         )
 
         return index_shard
 
     @WorkflowStep(step_id="step_4_preserve_references", description="Preserve cross-references")
-    def preserve_cross_references(self, shards: List[DocumentShard]) -> List[DocumentShard]:
-        """Update cross-references to work with sharded structure"""
-        # In production, parse and update internal links
-        # For design, return shards unchanged
+    def preserve_cross_references(
+        self,
+        run: ShardRun,
+        shards: List[DocumentShard],
+        index_shard: Optional[DocumentShard] = None,
+        source_path: str = ""
+    ) -> List[DocumentShard]:
+        """
+        Prepare links to keep working in the sharded structure.
+
+        The anchor index is built once over all headings. Each shard is
+        rewritten in a single scan when it is staged (see _stage_shard; code
+        blocks and code spans are left untouched), so the cost is linear in
+        document size regardless of link count:
+        - "#anchor" and "<source file>#anchor" point at the owning shard
+          (left as written when they already resolve within the shard)
+        - other relative links gain "../" since shards sit one level deeper
+        Links to anchors that no longer exist are collected in dangling_links.
+        """
+        documents = ([index_shard] if index_shard else []) + sorted(shards, key=lambda s: s.order)
+        run.anchor_index = AnchorIndex.build((doc.filename, doc.headings) for doc in documents)
+        run.shard_filenames = {doc.filename for doc in documents}
+        run.source_filename = source_path.rsplit('/', 1)[-1]
+        run.dangling_links = []
+
         return shards
 
+    def _rewrite_links(
+        self,
+        run: ShardRun,
+        doc_filename: str,
+        content: str
+    ) -> Tuple[str, List[DanglingLink], List[List]]:
+        """
+        Rewrite every link target in one pass over the shard.
+
+        Also returns its dangling links and, for unshard-doc, the original
+        target of each rewritten link as [link ordinal, original] pairs
+        (ordinals count every link rewrite_link_targets visits).
+        """
+        dangling: Dict[str, DanglingLink] = {}
+        originals: List[List] = []
+        ordinal = -1
+
+        def record(target: str) -> str:
+            nonlocal ordinal
+            ordinal += 1
+            new = rewrite_target(target)
+            if new != target:
+                originals.append([ordinal, target])
+            return new
+
+        def rewrite_target(target: str) -> str:
+            wrapped = target.startswith('<') and target.endswith('>')
+            bare = target[1:-1] if wrapped else target
+            if URL_SCHEME_RE.match(bare) or bare.startswith('/'):
+                return target
+
+            path, _, anchor = bare.partition('#')
+            normalized_path = path[2:] if path.startswith('./') else path
+
+            if normalized_path in ('', run.source_filename) and anchor:
+                resolved = run.anchor_index.resolve(anchor)
+                if resolved is None:
+                    dangling.setdefault(bare, DanglingLink(doc_filename, bare))
+                    return target
+                filename, local_anchor = resolved
+                if filename == doc_filename and not normalized_path and local_anchor == anchor.lower():
+                    # Same heading, same shard: keep the author's spelling
+                    return target
+                new = f"#{local_anchor}" if filename == doc_filename else f"./{filename}#{local_anchor}"
+            elif not normalized_path or normalized_path in run.shard_filenames:
+                # Already relative to the shard directory (e.g. generated index links)
+                return target
+            else:
+                # Prefix the path as written, so "./" survives
+                new = f"../{path}" + (f"#{anchor}" if anchor else '')
+
+            return f"<{new}>" if wrapped else new
+
+        content = ''.join(rewrite_link_targets(iter_lines(content), record))
+        return content, list(dangling.values()), originals
+
     @WorkflowStep(step_id="step_5_validate_integrity", description="Validate shard integrity")
     def validate_integrity(
         self,
-        original_content: str,
+        run: ShardRun,
+        original_content: DocumentSource,
         shards: List[DocumentShard]
-    ) -> bool:
-        """Validate no content lost during sharding"""
-        # Compare original vs combined shard content
-        # Ensure all sections accounted for
-        return True
+    ) -> List[IntegrityIssue]:
+        """
+        Verify every byte of the source landed in exactly one shard.
+
+        Checked against the raw source lines, not a second tokenization:
+        shards are walked in source order (index preamble first) and must
+        tile the source without gaps or overlaps, and each shard line must
+        equal the source line at that position, except that demotion may drop
+        one '#' from an ATX heading or turn a setext '-' underline into '='.
+        The index may continue past the preamble (generated navigation).
+        Memory is bounded by one shard; an issue carries the source byte
+        offset of the first differing line.
+
+        This is the only place a shard is materialized: once it checks out,
+        its link-rewritten bytes are staged for hashing and upload, so call
+        preserve_cross_references first. Pass the index shard too, so the
+        preamble is checked.
+        """
+        issues: List[IntegrityIssue] = []
+        index_shard = next((shard for shard in shards if shard.shard_id == "index"), None)
+        ordered = ([index_shard] if index_shard else []) + sorted(
+            (shard for shard in shards if shard is not index_shard), key=lambda s: s.order
+        )
+
+        source = self._offset_lines(document_lines(original_content))
+        current = next(source, None)
+
+        for shard in ordered:
+            is_index = shard is index_shard
+            label = "(preamble)" if is_index else shard.title
+
+            if current is not None and current[0] < shard.source_offset:
+                issues.append(IntegrityIssue(
+                    label, current[0], f"Source bytes before shard {shard.filename} are in no shard"
+                ))
+                while current is not None and current[0] < shard.source_offset:
+                    current = next(source, None)
+
+            position = current[0] if current is not None else self._offset_end(original_content)
+            if position != shard.source_offset:
+                issues.append(IntegrityIssue(
+                    label, shard.source_offset,
+                    f"Shard {shard.filename} overlaps the previous shard or does not start on a source line"
+                ))
+                continue
+
+            end = shard.source_offset + shard.source_length
+            content = self._shard_content(run, shard)
+            shard_lines = iter_lines(content)
+            mismatch: Optional[int] = None
+            while current is not None and current[0] < end:
+                line_offset, source_line = current
+                if mismatch is None and not self._matches_source_line(
+                    next(shard_lines, None), source_line, demoted=not is_index
+                ):
+                    mismatch = line_offset
+                current = next(source, None)
+
+            # The index may continue past the preamble; section shards may not
+            if mismatch is None and not is_index and next(shard_lines, None) is not None:
+                mismatch = end
+            if mismatch is not None:
+                issues.append(IntegrityIssue(label, mismatch, f"Shard {shard.filename} does not match source"))
+            else:
+                self._stage_shard(run, shard, content)
+
+        if current is not None:
+            issues.append(IntegrityIssue(
+                "(end of document)", current[0], "Source bytes after the last shard are in no shard"
+            ))
+
+        return issues
+
+    @staticmethod
+    def _matches_source_line(shard_line: Optional[str], source_line: str, demoted: bool) -> bool:
+        """True if shard_line is source_line, or (when demoted) that line with its heading demoted one level"""
+        if shard_line == source_line:
+            return True
+        if shard_line is None or not demoted:
+            return False
+        indent = len(source_line) - len(source_line.lstrip(' '))
+        body = source_line[indent:]
+        if body.startswith('##'):
+            return shard_line == source_line[:indent] + body[1:]
+        if body.strip() and set(body.strip()) == {'-'}:
+            return shard_line == source_line.replace('-', '=')
+        return False
+
+    @staticmethod
+    def _offset_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+        """Pair each line with its byte offset"""
+        offset = 0
+        for line in lines:
+            yield offset, line
+            offset += byte_len(line)
+
+    @staticmethod
+    def _offset_end(document: DocumentSource) -> int:
+        """Byte size of the normalized document"""
+        if isinstance(document, MappedDocument):
+            return document.size
+        return sum(byte_len(line) for line in iter_lines(document))
 
     def execute(
         self,
@@ -164,29 +502,47 @@ class ShardDocWorkflow(WorkflowAgent):
         """Execute document sharding workflow"""
         doc_type = DocumentType(document_type)
 
-        # Load original document
+        # Load original document (memory-mapped; released when done)
         original_content = self._load_document(bmad_project_id, document_path)
-
+        run = ShardRun()
+        try:
+            return self._shard_document(run, bmad_project_id, doc_type, document_path, original_content)
+        finally:
+            run.close()
+            if isinstance(original_content, MappedDocument):
+                original_content.close()
+
+    def _shard_document(
+        self,
+        run: ShardRun,
+        bmad_project_id: str,
+        doc_type: DocumentType,
+        document_path: str,
+        original_content: DocumentSource
+    ) -> Dict:
+        """Run the sharding steps over a loaded document"""
         # Analyze document
         strategy, sections = self.analyze_document(original_content, doc_type)
 
         # Extract shards
-        shards = self.extract_shards(original_content, sections, strategy)
+        shards = self.extract_shards(run, original_content, sections, strategy)
 
         # Generate index
-        index_shard = self.generate_index(shards, doc_type)
+        index_shard = self.generate_index(run, shards, doc_type)
 
-        # Preserve cross-references
-        shards = self.preserve_cross_references(shards)
+        # Preserve cross-references (anchor index; links are rewritten as shards are staged)
+        shards = self.preserve_cross_references(run, shards, index_shard, document_path)
 
-        # Validate integrity
-        valid = self.validate_integrity(original_content, shards)
+        # Validate integrity against the source, staging each shard's final bytes
+        issues = self.validate_integrity(run, original_content, shards + [index_shard])
 
-        if not valid:
-            raise ValueError("Shard integrity validation failed")
+        if issues:
+            details = '\n'.join(f"  - {i.section} @ byte {i.offset}: {i.message}" for i in issues)
+            raise ValueError(f"Shard integrity validation failed:\n{details}")
 
-        # Save shards
-        self._save_shards(bmad_project_id, doc_type, shards + [index_shard])
+        # Save shards (index last, only after every shard is stored)
+        source = {'path': document_path, **self._source_digest(original_content)}
+        upload = self._save_shards(run, bmad_project_id, doc_type, shards, index_shard, source)
 
         # Create result
         result = ShardingResult(
@@ -202,35 +558,64 @@ class ShardDocWorkflow(WorkflowAgent):
             'document_type': doc_type.value,
             'shard_count': len(shards),
             'index_file': index_shard.filename,
-            'shards': [s.filename for s in shards]
+            'shards': [s.filename for s in shards],
+            'uploaded': upload['uploaded'],
+            'skipped_unchanged': upload['skipped'],
+            'removed': upload['removed'],
+            'dangling_links': [vars(link) for link in run.dangling_links]
         }
 
     def _parse_prd_epics(self, content: str) -> List[str]:
-        """Parse PRD to identify epic sections"""
-        # In production, parse markdown headings
-        return ["User Authentication", "Dashboard", "Reports"]
+        """Parse PRD level-2 sections (epics plus supporting sections such as Requirements)"""
+        return self._parse_section_titles(content)
 
     def _parse_architecture_concerns(self, content: str) -> List[str]:
-        """Parse architecture to identify technical concerns"""
+        """Parse architecture level-2 sections (one technical concern each)"""
+        return self._parse_section_titles(content)
+
+    def _parse_section_titles(self, content: DocumentSource) -> List[str]:
+        """List level-2 section titles in one pass without retaining content"""
         return [
-            "Tech Stack", "Backend Architecture", "Frontend Architecture",
-            "Database Schema", "API Specification", "Testing Strategy"
+            section.title
+            for section in stream_markdown_sections(document_lines(content), keep_lines=False)
+            if section.title is not None
         ]
 
-    def _extract_section(self, content: str, section_title: str) -> str:
-        """Extract section content from document"""
-        # In production, parse markdown to extract section
-        return f"# {section_title}\n\nSection content..."
+    def _extract_section(self, content: DocumentSource, section_title: str) -> str:
+        """Extract a single section (stops scanning once the section closes)"""
+        for section in stream_markdown_sections(document_lines(content)):
+            if section.title == section_title:
+                return ''.join(section.render())
+
+        raise ValueError(f"Section not found: {section_title}")
 
     def _slugify(self, text: str) -> str:
-        """Convert title to slug (lowercase-hyphenated)"""
-        return text.lower().replace(' ', '-')
+        """Convert title to slug (lowercase-dash-case, special characters removed)"""
+        ascii_text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+        clean = re.sub(r'[^a-zA-Z0-9\s-]', '', ascii_text)
+        dashed = re.sub(r'\s+', '-', clean.strip()).lower()
+        return re.sub(r'-+', '-', dashed).strip('-')
 
-    def _build_index_content(self, shards: List[DocumentShard], doc_type: DocumentType) -> str:
+    def _build_index_content(self, run: ShardRun, shards: List[DocumentShard], doc_type: DocumentType) -> str:
         """Build index file content with navigation"""
-        links = '\n'.join([f"- [{shard.title}]({shard.filename})" for shard in sorted(shards, key=lambda s: s.order)])
+        links = '\n'.join([f"- [{shard.title}](./{shard.filename})" for shard in sorted(shards, key=lambda s: s.order)])
 
-        return f"""# {doc_type.value.upper()} Index
+        if run.preamble is not None and run.preamble.lines:
+            # Verbatim preamble (original title and intro), followed by section navigation
+            preamble = ''.join(run.preamble.lines)
+            separator = '' if preamble.endswith('\n\n') else '\n' if preamble.endswith('\n') else '\n\n'
+            tail = f"""{separator}## Sections
+
+{links}
+
+---
+
+**Shard Count**: {len(shards)}
+"""
+            run.index_tail_size = byte_len(tail)
+            return preamble + tail
+
+        content = f"""# {doc_type.value.upper()} Index
 
 ## Document Structure
 
@@ -238,20 +623,237 @@ class ShardDocWorkflow(WorkflowAgent):
 
 ---
 
-**Sharding Date**: {datetime.now().isoformat()}
 **Shard Count**: {len(shards)}
 """
+        run.index_tail_size = byte_len(content)
+        return content
+
+    def _load_document(self, project_id: str, document_path: str) -> MappedDocument:
+        """Stream document from Cloud Storage to a local temp file and memory-map it"""
+        bucket = self.storage.bucket(f"bmad-{project_id}-artifacts")
+        return MappedDocument.from_blob(bucket.blob(document_path))
+
+    def _read_section(self, run: ShardRun, offset: int, length: int) -> MarkdownSection:
+        """Re-tokenize one section from its byte range in the mapped source"""
+        lines = run.source.iter_lines(offset, offset + length)
+        section = next(
+            stream_markdown_sections(lines),
+            MarkdownSection(title=None, level=0, offset=0)
+        )
+        section.offset = offset
+        for heading in section.headings:
+            heading.offset += offset
+        return section
+
+    def _shard_content(self, run: ShardRun, shard: DocumentShard) -> str:
+        """Shard content as extracted (links not rewritten), materialized from the mapped source if lazy"""
+        if shard.content is not None:
+            return shard.content
+        return ''.join(self._read_section(run, shard.source_offset, shard.source_length).render())
+
+    def _stage_shard(self, run: ShardRun, shard: DocumentShard, content: str):
+        """Rewrite a shard's links and stage its final bytes, hash and section map"""
+        content, dangling, originals = self._rewrite_links(run, shard.filename, content)
+        run.dangling_links.extend(dangling)
+        data = content.encode('utf-8')
+        run.staged[shard.filename] = StagedShard(
+            sha256=hashlib.sha256(data).hexdigest(),
+            size=len(data),
+            sections=self._section_map(content),
+            spool_offset=run.stage(data),
+            links=originals
+        )
 
-    def _load_document(self, project_id: str, document_path: str) -> str:
-        """Load document from Cloud Storage"""
-        # In production, read from Cloud Storage
-        return "# Original Document\n\nContent..."
-
-    def _save_shards(self, project_id: str, doc_type: DocumentType, shards: List[DocumentShard]):
-        """Save shards to Cloud Storage"""
-        # In production, write each shard to Cloud Storage
-        bucket_name = f"bmad-{project_id}-artifacts"
+    def _save_shards(
+        self,
+        run: ShardRun,
+        project_id: str,
+        doc_type: DocumentType,
+        shards: List[DocumentShard],
+        index_shard: DocumentShard,
+        source: Optional[Dict] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Write only the shards that changed since the last run.
+
+        Content hashes are compared against the stored shard manifest, so an
+        unchanged re-shard costs a single manifest read. Changed shards are
+        uploaded with bounded concurrency and per-shard retries; objects that
+        already carry a matching hash in metadata (left by an interrupted run)
+        are skipped. The index is written after every shard succeeded, then
+        shards no longer produced are deleted, and the manifest is written
+        last so it only ever describes a complete set.
+
+        Hashes, sizes and bytes come from the shards staged by
+        validate_integrity; nothing is materialized again here.
+        """
+        bucket = self.storage.bucket(f"bmad-{project_id}-artifacts")
         output_dir = f"{doc_type.value}/"
 
-        for shard in shards:
-            print(f"  ✓ Saved shard: {output_dir}{shard.filename}")
+        stored_manifest = self._load_manifest(bucket, output_dir)
+        previous = stored_manifest.get('shards', {})
+
+        current = {doc.filename: run.staged[doc.filename].sha256 for doc in [index_shard] + shards}
+
+        changed = [
+            shard for shard in shards
+            if previous.get(shard.filename, {}).get('sha256') != current[shard.filename]
+        ]
+        index_changed = previous.get(index_shard.filename, {}).get('sha256') != current[index_shard.filename]
+        removed = [filename for filename in previous if filename not in current]
+
+        uploaded: List[str] = []
+        changed_filenames = {shard.filename for shard in changed}
+        skipped: List[str] = [shard.filename for shard in shards if shard.filename not in changed_filenames]
+
+        # Storage generation of each shard as it will be after this run
+        generations = {
+            filename: entry.get('generation')
+            for filename, entry in previous.items()
+        }
+
+        if changed or index_changed:
+            # Resume support: objects stored by an interrupted run already carry their hash
+            stored_hashes = {}
+            for blob in bucket.list_blobs(prefix=output_dir):
+                stored_hashes[blob.name] = (blob.metadata or {}).get('content_sha256')
+                generations[blob.name[len(output_dir):]] = blob.generation
+        else:
+            stored_hashes = {}
+
+        pending = []
+        for shard in changed:
+            if stored_hashes.get(output_dir + shard.filename) == current[shard.filename]:
+                skipped.append(shard.filename)
+            else:
+                pending.append(shard)
+
+        failed: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=self.UPLOAD_CONCURRENCY) as pool:
+            futures = {
+                pool.submit(self._upload_shard, run, bucket, output_dir, shard.filename): shard
+                for shard in pending
+            }
+            for future, shard in futures.items():
+                try:
+                    generations[shard.filename] = future.result()
+                    uploaded.append(shard.filename)
+                    print(f"  ✓ Saved shard: {output_dir}{shard.filename}")
+                except Exception as e:
+                    failed[shard.filename] = str(e)
+
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} shard(s) failed to upload; index not written. "
+                f"Re-run to resume: {failed}"
+            )
+
+        if not index_changed or stored_hashes.get(output_dir + index_shard.filename) == current[index_shard.filename]:
+            skipped.append(index_shard.filename)
+        else:
+            generations[index_shard.filename] = self._upload_shard(run, bucket, output_dir, index_shard.filename)
+            uploaded.append(index_shard.filename)
+            print(f"  ✓ Saved index: {output_dir}{index_shard.filename}")
+
+        for filename in removed:
+            try:
+                bucket.blob(output_dir + filename).delete()
+            except gcp_exceptions.NotFound:
+                pass
+            print(f"  ✓ Removed shard: {output_dir}{filename}")
+
+        manifest = {
+            'shards': {
+                doc.filename: {
+                    'sha256': current[doc.filename],
+                    'size': run.staged[doc.filename].size,
+                    'generation': generations.get(doc.filename),
+                    'order': doc.order,
+                    'sections': run.staged[doc.filename].sections,
+                    # Lets unshard-doc restore rewritten links exactly as written
+                    'links': run.staged[doc.filename].links
+                }
+                for doc in [index_shard] + shards
+            },
+            'anchors': run.anchor_index.to_dict(),
+            # Lets unshard-doc strip the generated navigation and verify reassembly
+            'index_tail_size': run.index_tail_size,
+            'source': source or {}
+        }
+        if any(manifest[key] != stored_manifest.get(key) for key in manifest):
+            self._save_manifest(bucket, output_dir, manifest)
+
+        return {'uploaded': uploaded, 'skipped': skipped, 'removed': removed}
+
+    def _section_map(self, content: str) -> List[Dict]:
+        """
+        Byte range of every heading's section within a shard, for ranged reads.
+
+        A section runs from its heading to the next heading of the same or a
+        higher level; a stack of still-open sections closes them in one pass.
+        Anchors are shard-local, matching the anchor index.
+        """
+        anchor_counts: Dict[str, int] = {}
+        sections: List[Dict] = []
+        open_sections: List[Dict] = []  # Strictly increasing levels
+        for section in stream_markdown_sections(iter_lines(content), split_level=1, keep_lines=False):
+            for heading in section.headings:
+                while open_sections and open_sections[-1]['level'] >= heading.level:
+                    closed = open_sections.pop()
+                    closed['length'] = heading.offset - closed['offset']
+                entry = {
+                    'title': heading.title,
+                    'level': heading.level,
+                    'anchor': AnchorIndex._dedupe(github_anchor(heading.title), anchor_counts),
+                    'offset': heading.offset,
+                    'length': 0
+                }
+                sections.append(entry)
+                open_sections.append(entry)
+
+        size = byte_len(content)
+        for entry in open_sections:
+            entry['length'] = size - entry['offset']
+        return sections
+
+    def _load_manifest(self, bucket: storage.Bucket, output_dir: str) -> Dict:
+        """Load the shard manifest written by the previous run ({} if none)"""
+        try:
+            return json.loads(bucket.blob(output_dir + self.MANIFEST_FILENAME).download_as_bytes())
+        except gcp_exceptions.NotFound:
+            return {}
+
+    def _save_manifest(self, bucket: storage.Bucket, output_dir: str, manifest: Dict):
+        """Write the shard manifest (per-shard hash, size, generation and section offsets; anchor index)"""
+        manifest = dict(manifest, updated_at=datetime.now().isoformat())
+        bucket.blob(output_dir + self.MANIFEST_FILENAME).upload_from_string(
+            json.dumps(manifest, indent=2, sort_keys=True),
+            content_type='application/json'
+        )
+
+    def _upload_shard(self, run: ShardRun, bucket: storage.Bucket, output_dir: str, filename: str) -> int:
+        """Upload one staged shard, retrying transient errors with exponential backoff; returns the new generation"""
+        content = run.read_staged(filename)
+        content_hash = run.staged[filename].sha256
+        blob_name = output_dir + filename
+
+        def upload() -> int:
+            blob = bucket.blob(blob_name)
+            blob.metadata = {'content_sha256': content_hash}
+            blob.upload_from_string(content, content_type='text/markdown; charset=utf-8')
+            return blob.generation
+
+        return with_retries(upload, self.UPLOAD_ATTEMPTS, self.TRANSIENT_UPLOAD_ERRORS)
+
+    def _source_digest(self, document: DocumentSource) -> Dict:
+        """SHA-256 and size of the normalized source, for verifying reassembly"""
+        if isinstance(document, MappedDocument):
+            return {'sha256': document.sha256(), 'size': document.size}
+
+        digest = hashlib.sha256()
+        size = 0
+        for line in iter_lines(document):
+            encoded = line.encode('utf-8')
+            digest.update(encoded)
+            size += len(encoded)
+        return {'sha256': digest.hexdigest(), 'size': size}
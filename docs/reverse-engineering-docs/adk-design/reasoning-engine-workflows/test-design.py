@@ -9,9 +9,13 @@ Reasoning Engine implementation for test-design task.
 **Analysis Reference**: analysis/tasks/test-design.md
 """
 
-from typing import Dict, List
-from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from dataclasses import dataclass, replace
+from itertools import combinations, product
 from enum import Enum
+import hashlib
+import json
+import re
 from datetime import datetime
 from google.cloud import firestore, storage
 from google import adk
@@ -43,6 +47,209 @@ class TestScenario:
     test_type: str  # happy_path, edge_case, error_handling
     test_data: Dict
     expected_outcome: str
+    linked_to: Optional[str] = None  # scenario_index key (fingerprint) of an existing equivalent scenario
+
+
+# Column order of the chunk encoding; enums are stored by value
+SCENARIO_FIELDS = (
+    'scenario_id', 'description', 'acceptance_criterion', 'test_level',
+    'priority', 'test_type', 'test_data', 'expected_outcome', 'linked_to'
+)
+
+
+def encode_scenario_chunk(index: int, scenarios: List[TestScenario]) -> Dict:
+    """
+    Encode scenarios column-wise (one array per field) so field names are
+    stored once per chunk rather than once per scenario.
+    """
+    columns: Dict[str, List] = {name: [] for name in SCENARIO_FIELDS}
+    for scenario in scenarios:
+        for name in SCENARIO_FIELDS:
+            value = getattr(scenario, name)
+            columns[name].append(value.value if isinstance(value, Enum) else value)
+    return {'index': index, 'count': len(scenarios), 'columns': columns}
+
+
+def firestore_size(value) -> int:
+    """Stored size of a Firestore value, per Firestore's storage size rules"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(key).encode('utf-8')) + 1 + firestore_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(firestore_size(item) for item in value)
+    return len(str(value).encode('utf-8')) + 1
+
+
+def scenario_encoded_size(scenario: TestScenario) -> int:
+    """Bytes one scenario adds to a column-encoded chunk"""
+    return sum(
+        firestore_size(value.value if isinstance(value, Enum) else value)
+        for value in (getattr(scenario, name) for name in SCENARIO_FIELDS)
+    )
+
+
+def decode_scenario_chunk(chunk: Dict) -> Iterator[TestScenario]:
+    """Yield the scenarios of an encoded chunk"""
+    columns = chunk['columns']
+    for i in range(chunk['count']):
+        # Columns added later (e.g. linked_to) are absent from older chunks
+        values = {name: columns[name][i] for name in SCENARIO_FIELDS if name in columns}
+        values['test_level'] = TestLevel(values['test_level'])
+        values['priority'] = TestPriority(values['priority'])
+        yield TestScenario(**values)
+
+
+# Words ignored when fingerprinting acceptance criteria
+_STOPWORDS = frozenset({'a', 'an', 'the', 'must', 'should', 'shall', 'be', 'is', 'are', 'to', 'of', 'and', 'can'})
+_MINHASH_PRIME = (1 << 61) - 1
+
+
+@dataclass
+class ScenarioFingerprint:
+    """
+    Normalized identity of a scenario for cross-story deduplication.
+
+    kind groups scenarios that can only be duplicates of each other (same
+    type, level, expected outcome and concrete values); sha256 identifies
+    exact duplicates; minhash estimates Jaccard similarity of the
+    acceptance-criterion shingles for near duplicates.
+    """
+    sha256: str
+    kind: str
+    minhash: List[int]
+
+    NUM_HASHES = 64
+    BANDS = 16  # LSH bands of NUM_HASHES / BANDS rows
+
+    @classmethod
+    def of(cls, scenario: TestScenario) -> 'ScenarioFingerprint':
+        words = [w for w in re.findall(r'[a-z0-9]+', scenario.acceptance_criterion.lower()) if w not in _STOPWORDS]
+        kind_source = json.dumps([
+            scenario.test_type,
+            getattr(scenario.test_level, 'value', scenario.test_level),
+            scenario.expected_outcome.strip().lower(),
+            (scenario.test_data or {}).get('values')
+        ], sort_keys=True, default=str)
+        kind = hashlib.sha256(kind_source.encode('utf-8')).hexdigest()[:16]
+        sha256 = hashlib.sha256(f"{kind}|{' '.join(words)}".encode('utf-8')).hexdigest()
+
+        # Words plus word bigrams: robust to small insertions, still order-aware
+        shingles = set(words) | {' '.join(words[i:i + 2]) for i in range(len(words) - 1)} or {''}
+        hashed = [
+            int.from_bytes(hashlib.blake2b(sh.encode('utf-8'), digest_size=8).digest(), 'big')
+            for sh in shingles
+        ]
+        minhash = [
+            min(((a * h + b) % _MINHASH_PRIME) for h in hashed)
+            for a, b in _MINHASH_PERMUTATIONS
+        ]
+        return cls(sha256=sha256, kind=kind, minhash=minhash)
+
+    def bands(self) -> List[str]:
+        """LSH band keys; near duplicates share at least one with high probability"""
+        rows = self.NUM_HASHES // self.BANDS
+        return [
+            f"{band}:" + hashlib.blake2b(
+                repr(self.minhash[band * rows:(band + 1) * rows]).encode('utf-8'), digest_size=8
+            ).hexdigest()
+            for band in range(self.BANDS)
+        ]
+
+    def similarity(self, other_minhash: List[int]) -> float:
+        """Estimated Jaccard similarity"""
+        return sum(1 for x, y in zip(self.minhash, other_minhash) if x == y) / len(self.minhash)
+
+
+# Fixed (a, b) pairs so fingerprints are stable across runs and processes
+_MINHASH_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], 'big') % (_MINHASH_PRIME - 1) + 1,
+        int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], 'big') % _MINHASH_PRIME
+    )
+    for i in range(ScenarioFingerprint.NUM_HASHES)
+]
+
+
+def covering_array(
+    parameters: Dict[str, Sequence],
+    strength: int = 2,
+    full_coverage: Sequence[str] = ()
+) -> List[Dict]:
+    """
+    Rows covering every combination of values for any `strength` parameters
+    (all-pairs for strength 2), built with IPOG.
+
+    Parameters named in full_coverage get their complete cross product.
+    They are placed first and seed the initial rows. Every other parameter
+    is added one at a time: existing rows are extended with the value
+    covering the most new tuples (horizontal growth), and remaining tuples
+    go into rows with free slots or new rows (vertical growth). Cost grows
+    polynomially with the number of parameters, not with the cross product.
+    """
+    names = [name for name in parameters if parameters[name]]
+    if not names:
+        return []
+
+    critical = [name for name in names if name in set(full_coverage)]
+    others = sorted((name for name in names if name not in critical), key=lambda n: -len(parameters[n]))
+    order = critical + others
+    values = [list(parameters[name]) for name in order]
+    t = max(1, min(strength, len(order)))
+
+    # Seed: full product of the critical parameters (or of the first t)
+    seed = max(t, len(critical))
+    rows: List[List[Optional[int]]] = [
+        list(combo) + [None] * (len(order) - seed)
+        for combo in product(*(range(len(v)) for v in values[:seed]))
+    ]
+
+    for i in range(seed, len(order)):
+        # Uncovered t-tuples pairing parameter i with t-1 earlier parameters
+        uncovered = {
+            columns: set(product(*(range(len(values[c])) for c in columns), range(len(values[i]))))
+            for columns in combinations(range(i), t - 1)
+        }
+
+        # Horizontal growth (ties go to the least used value)
+        used = [0] * len(values[i])
+        for row in rows:
+            best_value, best_gain = 0, (-1, 0)
+            for value in range(len(values[i])):
+                gain = 0
+                for columns, missing in uncovered.items():
+                    key = tuple(row[c] for c in columns) + (value,)
+                    if None not in key and key in missing:
+                        gain += 1
+                if (gain, -used[value]) > best_gain:
+                    best_value, best_gain = value, (gain, -used[value])
+            row[i] = best_value
+            used[best_value] += 1
+            for columns, missing in uncovered.items():
+                missing.discard(tuple(row[c] for c in columns) + (best_value,))
+
+        # Vertical growth
+        for columns, missing in uncovered.items():
+            for key in sorted(missing):
+                for row in rows:
+                    if row[i] == key[-1] and all(row[c] is None or row[c] == v for c, v in zip(columns, key)):
+                        break
+                else:
+                    row = [None] * len(order)
+                    row[i] = key[-1]
+                    rows.append(row)
+                for c, v in zip(columns, key):
+                    row[c] = v
+
+    # Free slots take any value
+    return [
+        {name: values[k][row[k] if row[k] is not None else 0] for k, name in enumerate(order)}
+        for row in rows
+    ]
 
 
 class TestDesignWorkflow(WorkflowAgent):
@@ -56,6 +263,26 @@ class TestDesignWorkflow(WorkflowAgent):
     Each scenario gets both a level and a priority.
     """
 
+    # Story fields read by this workflow (projection; large sections are skipped)
+    STORY_FIELDS = ['acceptance_criteria']
+
+    # Encoded-size budget per chunk document under test_designs/{story}/scenario_chunks:
+    # half of Firestore's 1 MiB document limit, however large individual scenarios are
+    SCENARIO_CHUNK_BYTES = 512 * 1024
+    MAX_DOCUMENT_BYTES = 1024 * 1024
+
+    # Firestore allows at most 500 writes per batch
+    WRITE_BATCH_SIZE = 500
+
+    # t-way coverage of scenario parameter spaces (2 = all pairs)
+    COVERAGE_STRENGTH = 2
+
+    # Risk scores at or above this make a category high-risk (CONCERNS/FAIL)
+    HIGH_RISK_SCORE = 6
+
+    # Estimated Jaccard similarity at which scenarios count as near duplicates
+    NEAR_DUPLICATE_THRESHOLD = 0.75
+
     def __init__(self, project_id: str, **kwargs):
         super().__init__()
         self.project_id = project_id
@@ -114,11 +341,113 @@ class TestDesignWorkflow(WorkflowAgent):
             scenario.test_data = {
                 'setup': 'Test data setup TBD',
                 'fixtures': [],
-                'mocks': []
+                'mocks': [],
+                'parameters': {},  # name -> candidate values
+                'parameter_categories': {}  # name -> RiskCategory value it exercises
             }
 
         return scenarios
 
+    @WorkflowStep(step_id="step_4_reduce_combinations", description="Reduce parameter spaces to t-way coverage")
+    def reduce_combinations(
+        self,
+        scenarios: List[TestScenario],
+        risk_profile: Dict,
+        strength: Optional[int] = None
+    ) -> List[TestScenario]:
+        """
+        Expand each scenario's parameter space into a covering array rather
+        than the full cross product. For P0 scenarios, parameters that
+        exercise a high-risk category from the risk profile get full
+        combinatorial coverage.
+        """
+        strength = strength or self.COVERAGE_STRENGTH
+        high_risk = {
+            getattr(a.get('category'), 'value', a.get('category'))
+            for a in risk_profile.get('assessments', [])
+            if a.get('score', 0) >= self.HIGH_RISK_SCORE
+        }
+
+        reduced = []
+        for scenario in scenarios:
+            parameters = scenario.test_data.get('parameters') or {}
+            if not parameters:
+                reduced.append(scenario)
+                continue
+
+            critical = []
+            if scenario.priority == TestPriority.P0:
+                categories = scenario.test_data.get('parameter_categories', {})
+                critical = [name for name in parameters if categories.get(name) in high_risk]
+
+            rows = covering_array(parameters, strength, critical)
+            for n, row in enumerate(rows, 1):
+                test_data = {k: v for k, v in scenario.test_data.items() if k != 'parameters'}
+                test_data['values'] = row
+                reduced.append(replace(scenario, scenario_id=f"{scenario.scenario_id}.{n}", test_data=test_data))
+
+        return reduced
+
+    @WorkflowStep(step_id="step_5_link_duplicates", description="Link scenarios duplicated in other stories")
+    def link_duplicate_scenarios(
+        self,
+        bmad_project_id: str,
+        story_id: str,
+        scenarios: List[TestScenario]
+    ) -> List[TestScenario]:
+        """
+        Link scenarios that already exist elsewhere in the project instead of
+        designing copies.
+
+        The project-wide scenario_index holds one entry per distinct
+        scenario, keyed by its exact fingerprint and carrying MinHash LSH
+        bands. Exact matches are looked up in one batched read; the rest
+        query candidates sharing a band and of the same kind, and link if
+        the estimated similarity reaches NEAR_DUPLICATE_THRESHOLD. Scenarios
+        without a match are registered as new index entries.
+
+        linked_to holds the matched entry's key rather than a scenario id,
+        so links survive the owning story being re-designed and renumbered;
+        resolve_link gives the scenario it currently points at.
+        """
+        index_ref = self.db.collection('projects').document(bmad_project_id).collection('scenario_index')
+        fingerprints = [ScenarioFingerprint.of(scenario) for scenario in scenarios]
+
+        existing = {
+            doc.id: doc.to_dict()
+            for doc in self.db.get_all([index_ref.document(fp.sha256) for fp in fingerprints])
+            if doc.exists
+        }
+
+        owned: Set[str] = set()  # Fingerprints registered by this story
+        linked: Set[str] = set()  # Other stories' entries this story links to
+        new_entries: List[Tuple[ScenarioFingerprint, TestScenario]] = []
+        for scenario, fp in zip(scenarios, fingerprints):
+            entry = existing.get(fp.sha256)
+            if entry is not None and entry['story_id'] != story_id:
+                scenario.linked_to = fp.sha256
+                linked.add(fp.sha256)
+                continue
+            if fp.sha256 in owned:
+                scenario.linked_to = fp.sha256
+                continue
+
+            near = self._find_near_duplicate(index_ref, fp, story_id)
+            if near is not None:
+                scenario.linked_to = near
+                linked.add(near)
+                continue
+
+            owned.add(fp.sha256)
+            new_entries.append((fp, scenario))
+
+        self._save_scenario_index(bmad_project_id, index_ref, story_id, new_entries, linked)
+
+        linked_count = sum(1 for scenario in scenarios if scenario.linked_to)
+        if linked_count:
+            print(f"  ✓ Linked {linked_count} scenarios to existing equivalents")
+        return scenarios
+
     def execute(self, bmad_project_id: str, story_id: str) -> Dict:
         """Execute test design workflow"""
         story = self._load_story(bmad_project_id, story_id)
@@ -133,6 +462,12 @@ class TestDesignWorkflow(WorkflowAgent):
         # Add test data
         scenarios = self.add_test_data_requirements(scenarios)
 
+        # Reduce parameter spaces to t-way coverage
+        scenarios = self.reduce_combinations(scenarios, risk_profile)
+
+        # Link scenarios that already exist in other stories
+        scenarios = self.link_duplicate_scenarios(bmad_project_id, story_id, scenarios)
+
         # Save test design
         self._save_test_design(bmad_project_id, story_id, scenarios)
 
@@ -141,7 +476,8 @@ class TestDesignWorkflow(WorkflowAgent):
             'story_id': story_id,
             'scenario_count': len(scenarios),
             'p0_count': sum(1 for s in scenarios if s.priority == TestPriority.P0),
-            'unit_count': sum(1 for s in scenarios if s.test_level == TestLevel.UNIT)
+            'unit_count': sum(1 for s in scenarios if s.test_level == TestLevel.UNIT),
+            'linked_count': sum(1 for s in scenarios if s.linked_to)
         }
 
     def _determine_test_level(self, scenario: TestScenario) -> TestLevel:
@@ -163,16 +499,229 @@ class TestDesignWorkflow(WorkflowAgent):
             return TestPriority.P2
 
     def _load_story(self, project_id: str, story_id: str) -> Dict:
-        return self.db.collection('projects').document(project_id).collection('stories').document(story_id).get().to_dict()
+        story_ref = self.db.collection('projects').document(project_id).collection('stories').document(story_id)
+        return story_ref.get(field_paths=self.STORY_FIELDS).to_dict()
 
     def _load_risk_profile(self, project_id: str, story_id: str) -> Dict:
         profile = self.db.collection('projects').document(project_id).collection('risk_profiles').document(story_id).get()
         return profile.to_dict() if profile.exists else {}
 
+    def _find_near_duplicate(self, index_ref, fp: ScenarioFingerprint, story_id: str) -> Optional[str]:
+        """Key of the best index entry from another story above the similarity threshold"""
+        candidates = (
+            index_ref
+            .where('kind', '==', fp.kind)
+            .where('bands', 'array_contains_any', fp.bands())
+            .select(['story_id', 'minhash'])
+            .stream()
+        )
+        best, best_similarity = None, self.NEAR_DUPLICATE_THRESHOLD
+        for doc in candidates:
+            entry = doc.to_dict()
+            if entry['story_id'] == story_id:
+                continue
+            similarity = fp.similarity(entry['minhash'])
+            if similarity >= best_similarity:
+                best, best_similarity = doc.id, similarity
+        return best
+
+    def _save_scenario_index(
+        self,
+        project_id: str,
+        index_ref,
+        story_id: str,
+        entries: List[Tuple[ScenarioFingerprint, TestScenario]],
+        linked: Set[str]
+    ):
+        """
+        Register this story's distinct scenarios and keep inbound links valid.
+
+        Each entry's linked_by lists the stories linking to it. Entries this
+        story no longer produces are deleted, and links other stories hold
+        to them are cleared first, so no stored link dangles.
+        """
+        keep = {fp.sha256 for fp, _ in entries}
+        stale = [doc for doc in index_ref.where('story_id', '==', story_id).select(['linked_by']).stream()
+                 if doc.id not in keep]
+        unlinked = [doc.reference for doc in index_ref.where('linked_by', 'array_contains', story_id).select([]).stream()
+                    if doc.id not in linked]
+
+        for doc in stale:
+            for linker in (doc.to_dict() or {}).get('linked_by', []):
+                if linker != story_id:
+                    self._clear_links(project_id, linker, doc.id)
+
+        # Merged so linked_by survives re-registration
+        operations = [('merge', index_ref.document(fp.sha256), {
+            'story_id': story_id,
+            'scenario_id': scenario.scenario_id,
+            'kind': fp.kind,
+            'minhash': fp.minhash,
+            'bands': fp.bands()
+        }) for fp, scenario in entries]
+        operations += [('update', index_ref.document(key), {'linked_by': firestore.ArrayUnion([story_id])})
+                       for key in sorted(linked)]
+        operations += [('update', ref, {'linked_by': firestore.ArrayRemove([story_id])}) for ref in unlinked]
+        operations += [('delete', doc.reference, None) for doc in stale]
+
+        for start in range(0, len(operations), self.WRITE_BATCH_SIZE):
+            batch = self.db.batch()
+            for kind, ref, data in operations[start:start + self.WRITE_BATCH_SIZE]:
+                if kind == 'delete':
+                    batch.delete(ref)
+                elif kind == 'update':
+                    batch.update(ref, data)
+                else:
+                    batch.set(ref, data, merge=True)
+            batch.commit()
+
+    def _clear_links(self, project_id: str, story_id: str, key: str):
+        """Unlink one story's stored scenarios from a scenario_index entry that is being removed"""
+        chunks_ref = self._test_design_ref(project_id, story_id).collection('scenario_chunks')
+        chunks = list(chunks_ref.where('columns.linked_to', 'array_contains', key).stream())
+        for start in range(0, len(chunks), self.WRITE_BATCH_SIZE):
+            batch = self.db.batch()
+            for chunk in chunks[start:start + self.WRITE_BATCH_SIZE]:
+                links = chunk.to_dict()['columns']['linked_to']
+                batch.update(chunk.reference, {
+                    'columns.linked_to': [None if link == key else link for link in links]
+                })
+            batch.commit()
+        if chunks:
+            print(f"  ✓ Cleared links from story {story_id} to removed scenario {key[:12]}")
+
+    def resolve_link(self, project_id: str, linked_to: str) -> Optional[str]:
+        """"story_id/scenario_id" a scenario's link points at now (None if the entry was removed)"""
+        if '/' in linked_to:
+            # Stored before links were keyed by fingerprint
+            return linked_to
+        index_ref = self.db.collection('projects').document(project_id).collection('scenario_index')
+        entry = index_ref.document(linked_to).get(field_paths=['story_id', 'scenario_id'])
+        if not entry.exists:
+            return None
+        data = entry.to_dict()
+        return f"{data['story_id']}/{data['scenario_id']}"
+
+    def iter_test_design(self, project_id: str, story_id: str) -> Iterator[TestScenario]:
+        """Page through a stored test design lazily, one chunk document at a time"""
+        design_ref = self._test_design_ref(project_id, story_id)
+        header = design_ref.get()
+        if not header.exists:
+            return
+
+        legacy = header.to_dict().get('scenarios')
+        if legacy is not None:
+            # Stored before chunking: scenarios inline in the design document
+            yield from decode_scenario_chunk({
+                'count': len(legacy),
+                'columns': {name: [scenario.get(name) for scenario in legacy] for name in SCENARIO_FIELDS}
+            })
+            return
+
+        for chunk in design_ref.collection('scenario_chunks').order_by('index').stream():
+            yield from decode_scenario_chunk(chunk.to_dict())
+
+    def append_scenarios(self, project_id: str, story_id: str, scenarios: List[TestScenario]):
+        """
+        Append scenarios to a stored test design, writing only the chunks
+        that change: the last chunk (topped up within its byte budget),
+        then new chunks.
+        """
+        design_ref = self._test_design_ref(project_id, story_id)
+        header = design_ref.get()
+        if not header.exists or 'scenarios' in header.to_dict():
+            existing = list(self.iter_test_design(project_id, story_id))
+            self._save_test_design(project_id, story_id, existing + scenarios)
+            return
+
+        meta = header.to_dict()
+        count = meta['scenario_count']
+        chunks_ref = design_ref.collection('scenario_chunks')
+
+        pending = list(scenarios)
+        first_index = meta['chunk_count']
+        if first_index:
+            # Re-pack the last chunk together with the new scenarios
+            first_index -= 1
+            last = chunks_ref.document(self._chunk_id(first_index)).get().to_dict()
+            pending = list(decode_scenario_chunk(last)) + pending
+
+        chunks = self._chunk(pending, first_index)
+        self._write_chunks(design_ref, chunks, {
+            'scenario_count': count + len(scenarios),
+            'chunk_bytes': self.SCENARIO_CHUNK_BYTES,
+            'chunk_count': first_index + len(chunks),
+            'updated_at': datetime.now().isoformat()
+        }, merge=True)
+
     def _save_test_design(self, project_id: str, story_id: str, scenarios: List[TestScenario]):
-        design_ref = self.db.collection('projects').document(project_id).collection('test_designs').document(story_id)
-        design_ref.set({
+        """Store a test design as a small header plus size-bounded scenario chunks"""
+        design_ref = self._test_design_ref(project_id, story_id)
+        previous = design_ref.get()
+        previous_chunks = previous.to_dict().get('chunk_count', 0) if previous.exists else 0
+
+        chunks = self._chunk(scenarios, 0)
+        now = datetime.now().isoformat()
+        self._write_chunks(design_ref, chunks, {
             'story_id': story_id,
-            'scenarios': [vars(s) for s in scenarios],
-            'created_at': datetime.now().isoformat()
-        })
+            'scenario_count': len(scenarios),
+            'chunk_bytes': self.SCENARIO_CHUNK_BYTES,
+            'chunk_count': len(chunks),
+            'created_at': now,
+            'updated_at': now
+        }, stale_chunks=range(len(chunks), previous_chunks))
+
+    def _chunk(self, scenarios: List[TestScenario], first_index: int) -> List[Dict]:
+        """
+        Pack scenarios in order into chunks of at most SCENARIO_CHUNK_BYTES
+        encoded bytes (at least one scenario per chunk). A scenario that
+        cannot fit in a document on its own is rejected.
+        """
+        # Field names, 'index'/'count' and document name overhead, stored once per chunk
+        overhead = 256 + sum(len(name) + 1 for name in SCENARIO_FIELDS)
+
+        chunks: List[Dict] = []
+        current: List[TestScenario] = []
+        current_bytes = overhead
+        for scenario in scenarios:
+            size = scenario_encoded_size(scenario)
+            if overhead + size > self.MAX_DOCUMENT_BYTES:
+                raise ValueError(
+                    f"Scenario {scenario.scenario_id} encodes to {size} bytes, over Firestore's document limit"
+                )
+            if current and current_bytes + size > self.SCENARIO_CHUNK_BYTES:
+                chunks.append(encode_scenario_chunk(first_index + len(chunks), current))
+                current, current_bytes = [], overhead
+            current.append(scenario)
+            current_bytes += size
+        if current:
+            chunks.append(encode_scenario_chunk(first_index + len(chunks), current))
+        return chunks
+
+    def _write_chunks(self, design_ref, chunks: List[Dict], header: Dict, stale_chunks=(), merge: bool = False):
+        """
+        Write chunks, delete stale ones, then the header, in batches. The
+        header goes in the last batch so readers never see a count ahead of
+        the chunks.
+        """
+        chunks_ref = design_ref.collection('scenario_chunks')
+        operations = [('set', chunks_ref.document(self._chunk_id(c['index'])), c) for c in chunks]
+        operations += [('delete', chunks_ref.document(self._chunk_id(i)), None) for i in stale_chunks]
+        operations.append(('header', design_ref, header))
+
+        for start in range(0, len(operations), self.WRITE_BATCH_SIZE):
+            batch = self.db.batch()
+            for kind, ref, data in operations[start:start + self.WRITE_BATCH_SIZE]:
+                if kind == 'delete':
+                    batch.delete(ref)
+                elif kind == 'header':
+                    batch.set(ref, data, merge=merge)
+                else:
+                    batch.set(ref, data)
+            batch.commit()
+
+    def _chunk_id(self, index: int) -> str:
+        return f"{index:05d}"
+
+    def _test_design_ref(self, project_id: str, story_id: str):
+        return self.db.collection('projects').document(project_id).collection('test_designs').document(story_id)
@@ -0,0 +1,82 @@
+"""
+Test setup for the reasoning engine workflows.
+
+Workflow files are named like their tasks (shard-doc.py) and deployed
+under module names (shard_doc); they are registered here under those
+names so tests can import them. When the Google Cloud and ADK packages
+are not installed, minimal stand-ins are registered first: the tests
+only exercise the pure parts of each workflow and never reach a client.
+"""
+
+import importlib.util
+import os
+import sys
+import types
+
+WORKFLOWS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORKFLOWS_DIR)
+
+# Workflow modules exercised by the tests (file name -> module name)
+WORKFLOW_MODULES = ('apply-qa-fixes', 'execute-checklist', 'shard-doc', 'unshard-doc', 'test-design')
+
+
+def _install_stand_ins():
+    """Register placeholder google.cloud / google.api_core / ADK modules"""
+    def module(name, **attributes):
+        mod = types.ModuleType(name)
+        mod.__dict__.update(attributes)
+        sys.modules[name] = mod
+        return mod
+
+    class Client:
+        def __init__(self, *args, **kwargs):
+            raise RuntimeError("Cloud clients are not available in tests")
+
+    class Transform:
+        def __init__(self, values):
+            self.values = list(values)
+
+    class WorkflowAgent:
+        def __init__(self, *args, **kwargs):
+            pass
+
+    def WorkflowStep(**kwargs):
+        return lambda method: method
+
+    exceptions = module('google.api_core.exceptions', **{
+        name: type(name, (Exception,), {})
+        for name in (
+            'NotFound', 'PreconditionFailed', 'NotModified', 'Conflict', 'Aborted', 'TooManyRequests',
+            'InternalServerError', 'BadGateway', 'ServiceUnavailable', 'GatewayTimeout', 'DeadlineExceeded'
+        )
+    })
+    firestore = module(
+        'google.cloud.firestore', Client=Client, ArrayUnion=Transform, ArrayRemove=Transform,
+        Increment=Transform, SERVER_TIMESTAMP=object(), DELETE_FIELD=object()
+    )
+    storage = module(
+        'google.cloud.storage', Client=Client,
+        Bucket=type('Bucket', (), {}), Blob=type('Blob', (), {})
+    )
+    adk = module('google.adk')
+    module('google', cloud=module('google.cloud', firestore=firestore, storage=storage),
+           api_core=module('google.api_core', exceptions=exceptions), adk=adk)
+    module('adk', workflows=module('adk.workflows', WorkflowAgent=WorkflowAgent, WorkflowStep=WorkflowStep))
+
+
+def _load_workflow(filename: str):
+    name = filename.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(WORKFLOWS_DIR, f"{filename}.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+
+
+try:
+    import google.cloud.firestore  # noqa: F401
+    import adk.workflows  # noqa: F401
+except ImportError:
+    _install_stand_ins()
+
+for _filename in WORKFLOW_MODULES:
+    _load_workflow(_filename)
@@ -0,0 +1,154 @@
+"""Tests for QA fix batching, bisection, file partitioning and worktree setup"""
+
+import os
+import subprocess
+
+import pytest
+
+import apply_qa_fixes
+from apply_qa_fixes import QAFix
+
+
+def make_fixes(*file_paths):
+    return [QAFix(f"FIX-{i}", '', 'medium', path, '') for i, path in enumerate(file_paths, 1)]
+
+
+class FakeTree:
+    """
+    Fix application against an in-memory set of applied fixes.
+
+    A test run fails while any fix in `breaking` is applied, and raises
+    while any fix in `crashing` is applied.
+    """
+
+    def __init__(self, breaking=(), crashing=()):
+        self.breaking = set(breaking)
+        self.crashing = set(crashing)
+        self.applied = set()
+        self.test_runs = 0
+
+    def workflow(self):
+        workflow = apply_qa_fixes.ApplyQAFixesWorkflow.__new__(apply_qa_fixes.ApplyQAFixesWorkflow)
+        workflow._select_tests = True
+        workflow._apply_single_fix = lambda fix: self.applied.add(fix.fix_id)
+        workflow._rollback_fix = lambda fix: self.applied.discard(fix.fix_id)
+        workflow._verify_fixes = self.verify
+        return workflow
+
+    def verify(self, fixes):
+        self.test_runs += 1
+        if self.applied & self.crashing:
+            raise RuntimeError("test runner crashed")
+        return not self.applied & self.breaking
+
+
+def test_conflict_free_batches_split_at_repeated_files():
+    fixes = make_fixes('a.py', 'b.py', 'a.py', 'c.py', 'c.py')
+    workflow = FakeTree().workflow()
+
+    batches = workflow._conflict_free_batches(fixes)
+
+    assert [[fix.fix_id for fix in batch] for batch in batches] == [
+        ['FIX-1', 'FIX-2'], ['FIX-3', 'FIX-4'], ['FIX-5']
+    ]
+
+
+def test_partition_by_file_keeps_files_together_and_severity_order(monkeypatch):
+    monkeypatch.setattr(apply_qa_fixes.ApplyQAFixesWorkflow, 'MAX_PARALLEL_GROUPS', 2)
+    fixes = make_fixes('a.py', 'b.py', 'a.py', 'c.py', 'b.py')
+    workflow = FakeTree().workflow()
+
+    groups = workflow._partition_by_file(fixes)
+
+    assert [[fix.fix_id for fix in group] for group in groups] == [
+        ['FIX-1', 'FIX-3', 'FIX-4'], ['FIX-2', 'FIX-5']
+    ]
+    files_per_group = [{fix.file_path for fix in group} for group in groups]
+    assert not files_per_group[0] & files_per_group[1]
+
+
+def test_passing_batch_is_tested_once():
+    tree = FakeTree()
+    fixes = make_fixes('a.py', 'b.py', 'c.py', 'd.py')
+
+    tree.workflow()._apply_batch(fixes)
+
+    assert tree.test_runs == 1
+    assert all(fix.applied and fix.tests_passed for fix in fixes)
+
+
+@pytest.mark.parametrize('breaking', [{'FIX-1'}, {'FIX-6'}, {'FIX-3', 'FIX-7'}, {'FIX-1', 'FIX-2', 'FIX-8'}])
+def test_bisection_rolls_back_exactly_the_failing_fixes(breaking):
+    tree = FakeTree(breaking=breaking)
+    fixes = make_fixes(*(f"f{i}.py" for i in range(8)))
+
+    tree.workflow()._apply_batch(fixes)
+
+    assert {fix.fix_id for fix in fixes if not fix.applied} == breaking
+    assert tree.applied == {fix.fix_id for fix in fixes} - breaking
+    assert all(fix.tests_passed == fix.applied for fix in fixes)
+
+
+def test_bisection_needs_fewer_runs_than_sequential_testing():
+    tree = FakeTree(breaking={'FIX-11'})
+    fixes = make_fixes(*(f"f{i}.py" for i in range(16)))
+
+    tree.workflow()._apply_batch(fixes)
+
+    assert tree.test_runs < len(fixes) // 2
+
+
+def test_test_run_errors_count_as_failures():
+    tree = FakeTree(crashing={'FIX-2'})
+    fixes = make_fixes('a.py', 'b.py', 'c.py', 'd.py')
+
+    tree.workflow()._apply_batch(fixes)
+
+    assert [fix.applied for fix in fixes] == [True, False, True, True]
+    assert tree.applied == {'FIX-1', 'FIX-3', 'FIX-4'}
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """Working tree with no commits yet, an ignored dependency dir and an ignored .env"""
+    root = tmp_path / 'repo'
+    root.mkdir()
+    subprocess.run(['git', 'init', '-q', str(root)], check=True)
+    (root / '.gitignore').write_text('node_modules/\n.env\n')
+    (root / 'app.py').write_text('X = 1\n')
+    (root / '.env').write_text('TOKEN=1\n')
+    (root / 'node_modules' / 'dep').mkdir(parents=True)
+    (root / 'node_modules' / 'dep' / 'index.js').write_text('')
+    return root
+
+
+def git_workflow(root):
+    workflow = apply_qa_fixes.ApplyQAFixesWorkflow.__new__(apply_qa_fixes.ApplyQAFixesWorkflow)
+    workflow.repo_path = str(root)
+    return workflow
+
+
+def test_snapshot_commit_on_an_unborn_head(git_repo):
+    workflow = git_workflow(git_repo)
+
+    base = workflow._snapshot_commit()
+
+    files = workflow._git('ls-tree', '-r', '--name-only', base).decode().split()
+    assert files == ['.gitignore', 'app.py']
+
+
+def test_worktrees_see_ignored_paths(git_repo, tmp_path, monkeypatch):
+    workflow = git_workflow(git_repo)
+    workflow.impact = type('Impact', (), {'clone': lambda self, path: self})()
+    base = workflow._snapshot_commit()
+    worktree = tmp_path / 'worktree'
+    worktree.mkdir()
+    monkeypatch.setattr(apply_qa_fixes.tempfile, 'mkdtemp', lambda prefix: str(worktree))
+    seen = []
+    workflow._apply_fixes = lambda fixes, group_testing: seen.extend(os.listdir(worktree))
+
+    workflow._apply_in_worktree(base, [], True, workflow._ignored_paths())
+
+    assert workflow._ignored_paths() == ['.env', 'node_modules']
+    assert {'.env', 'node_modules', 'app.py'} <= set(seen)
+    assert (git_repo / 'node_modules' / 'dep' / 'index.js').exists()
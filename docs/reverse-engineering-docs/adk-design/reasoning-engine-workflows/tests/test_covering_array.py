@@ -0,0 +1,59 @@
+"""Tests for t-way covering arrays used to reduce scenario parameter spaces"""
+
+from itertools import combinations, product
+
+import pytest
+
+import test_design
+
+
+def uncovered(rows, parameters, strength, names=None):
+    """t-tuples of values (over names, default all parameters) no row covers"""
+    names = list(names or parameters)
+    missing = []
+    for columns in combinations(names, min(strength, len(names))):
+        seen = {tuple(row[name] for name in columns) for row in rows}
+        missing += [
+            (columns, combo) for combo in product(*(parameters[name] for name in columns))
+            if combo not in seen
+        ]
+    return missing
+
+
+PARAMETERS = {
+    'browser': ['chrome', 'firefox', 'safari'],
+    'os': ['linux', 'macos', 'windows'],
+    'locale': ['en', 'de', 'ja', 'fr'],
+    'plan': ['free', 'pro'],
+    'auth': ['password', 'sso'],
+    'network': ['fast', 'slow'],
+}
+
+
+@pytest.mark.parametrize('strength', [1, 2, 3])
+def test_every_t_tuple_is_covered(strength):
+    rows = test_design.covering_array(PARAMETERS, strength)
+
+    assert uncovered(rows, PARAMETERS, strength) == []
+    assert all(set(row) == set(PARAMETERS) for row in rows)
+
+
+def test_pairwise_is_much_smaller_than_the_cross_product():
+    rows = test_design.covering_array(PARAMETERS, 2)
+
+    assert len(rows) <= 20  # cross product: 288
+    assert len(rows) >= 4 * 3  # lower bound: the two largest parameters' pairs
+
+
+def test_full_coverage_parameters_get_their_cross_product():
+    rows = test_design.covering_array(PARAMETERS, 2, full_coverage=['auth', 'plan', 'network'])
+
+    assert uncovered(rows, PARAMETERS, 3, names=['auth', 'plan', 'network']) == []
+    assert uncovered(rows, PARAMETERS, 2) == []
+
+
+def test_degenerate_parameter_spaces():
+    assert test_design.covering_array({}) == []
+    assert test_design.covering_array({'empty': []}) == []
+    assert test_design.covering_array({'only': [1, 2, 3]}) == [{'only': 1}, {'only': 2}, {'only': 3}]
+    assert len(test_design.covering_array({'a': [1, 2], 'b': [3, 4]}, strength=3)) == 4
@@ -0,0 +1,181 @@
+"""Tests for checklist execution order, the outcome memo and outcome counters"""
+
+import execute_checklist
+from execute_checklist import CheckResultMemo, ChecklistItem
+
+
+def make_workflow(memo):
+    workflow = execute_checklist.ExecuteChecklistWorkflow.__new__(execute_checklist.ExecuteChecklistWorkflow)
+    workflow.memo = memo
+    workflow.llm_concurrency = 2
+    return workflow
+
+
+class CountingCheck:
+    """Automated check that records how often it ran"""
+
+    def __init__(self, result=True):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, artifact):
+        self.calls += 1
+        return self.result
+
+
+def automated(item_id, check, reads=('title',)):
+    return ChecklistItem(item_id, '', 'structure', 'automated', check=check, reads=list(reads))
+
+
+def test_memo_evicts_least_recently_used():
+    memo = CheckResultMemo(max_entries=2)
+    memo.put(('c', 'a', 'v1', 'h'), True, '')
+    memo.put(('c', 'b', 'v1', 'h'), True, '')
+    memo.get(('c', 'a', 'v1', 'h'))
+    memo.put(('c', 'c', 'v1', 'h'), False, 'no')
+
+    assert memo.get(('c', 'a', 'v1', 'h')) == (True, '')
+    assert memo.get(('c', 'b', 'v1', 'h')) is None
+    assert memo.get(('c', 'c', 'v1', 'h')) == (False, 'no')
+
+
+def test_memo_reuses_outcomes_for_unchanged_inputs():
+    check = CountingCheck()
+    workflow = make_workflow(CheckResultMemo())
+
+    for title in ('Story', 'Story', 'Renamed'):
+        items = [automated('title-present', check)]
+        workflow.execute_checks_concurrent(
+            items, {'title': title}, checklist_version='v1', checklist_name='story-draft-checklist'
+        )
+        assert items[0].passed
+
+    assert check.calls == 2
+
+
+def test_memo_is_scoped_by_checklist_name():
+    failing, passing = CountingCheck(result=False), CountingCheck(result=True)
+    workflow = make_workflow(CheckResultMemo())
+    artifact = {'title': 'Story'}
+
+    first = [automated('item-1', failing, reads=())]
+    workflow.execute_checks_concurrent(first, artifact, checklist_version='v1', checklist_name='story-dod-checklist')
+    second = [automated('item-1', passing, reads=())]
+    workflow.execute_checks_concurrent(second, artifact, checklist_version='v1', checklist_name='po-master-checklist')
+
+    assert not first[0].passed
+    assert second[0].passed
+    assert passing.calls == 1
+
+
+def test_fail_fast_skipped_items_are_not_memoized():
+    memo = CheckResultMemo()
+    workflow = make_workflow(memo)
+    never_run = CountingCheck()
+    items = [automated('fails', CountingCheck(result=False)), automated('skipped', never_run)]
+
+    workflow.execute_checks_concurrent(
+        items, {'title': 'Story'}, failure_rates={'fails': 1.0}, fail_fast=True,
+        checklist_version='v1', checklist_name='story-draft-checklist'
+    )
+
+    assert items[1].notes == execute_checklist.SKIPPED_NOTE
+    assert items[1].input_hash == ''
+    assert never_run.calls == 0
+    assert len(memo._entries) == 1
+
+
+def test_seed_scopes_by_checklist_and_ignores_unevaluated_items():
+    memo = CheckResultMemo()
+    memo.seed({
+        'checklist_id': 'story-draft-checklist',
+        'checklist_version': 'v1',
+        'items': [
+            {'item_id': 'a', 'passed': True, 'notes': '', 'input_hash': 'h1'},
+            {'item_id': 'b', 'passed': False, 'notes': execute_checklist.SKIPPED_NOTE, 'input_hash': 'h2'},
+            {'item_id': 'c', 'passed': False, 'notes': f"{execute_checklist.LLM_ERROR_NOTE}: timeout", 'input_hash': 'h3'},
+            {'item_id': 'd', 'passed': False, 'notes': 'Manual validation required', 'input_hash': ''},
+        ]
+    })
+
+    assert memo.get(('story-draft-checklist', 'a', 'v1', 'h1')) == (True, '')
+    assert memo.get(('po-master-checklist', 'a', 'v1', 'h1')) is None
+    assert len(memo._entries) == 1
+
+
+def test_manual_items_do_not_decide_fail_fast():
+    workflow = make_workflow(CheckResultMemo())
+    check = CountingCheck(result=True)
+    manual = ChecklistItem('review', '', 'structure', 'manual')
+    items = [manual, automated('title-present', check)]
+
+    workflow.execute_checks_concurrent(
+        items, {'title': 'Story'}, failure_rates={'review': 1.0}, fail_fast=True,
+        checklist_version='v1', checklist_name='story-draft-checklist'
+    )
+
+    assert manual.notes == 'Manual validation required'
+    assert items[1].passed
+    assert check.calls == 1
+
+
+def test_outcome_counts_ignore_skipped_items():
+    workflow = make_workflow(CheckResultMemo())
+    results = []
+    for passed in (True, False):
+        items = [ChecklistItem('a', '', 'structure', 'automated'), ChecklistItem('b', '', 'structure', 'automated')]
+        items[0].passed, items[1].passed = passed, False
+        items[1].notes = execute_checklist.SKIPPED_NOTE if passed else ''
+        results.append(execute_checklist.ChecklistResult('story-draft-checklist', 'story-1', items, passed, '', 'test'))
+
+    counts = workflow._outcome_counts(results)
+
+    assert counts == {'story-draft-checklist': {'a': (2, 1), 'b': (1, 1)}}
+    assert workflow._failure_rates({'items': {'a': {'runs': 2, 'failures': 1}, 'c': {'runs': 0}}}) == {'a': 0.5}
+
+
+class FakeBlob:
+    def __init__(self, source, generation=1):
+        self.source = source
+        self.generation = generation
+        self.downloads = 0
+
+    def download_as_bytes(self, if_generation_match=None):
+        self.downloads += 1
+        return self.source
+
+
+class FakeStorage:
+    def __init__(self, blob):
+        self.blob = blob
+
+    def bucket(self, name):
+        return self
+
+    def get_blob(self, path):
+        return self.blob
+
+
+def test_registry_snapshots_yaml_with_dates(tmp_path):
+    blob = FakeBlob(
+        b"version: 2\nreviewed: 2024-05-01\nitems:\n"
+        b"  - {id: 1, description: Title, validation_method: automated, check: field_present, args: {field: title}}\n"
+    )
+    execute_checklist.ChecklistRegistry(FakeStorage(blob), snapshot_dir=str(tmp_path)).get('story-draft-checklist')
+
+    compiled = execute_checklist.ChecklistRegistry(FakeStorage(blob), snapshot_dir=str(tmp_path)).get('story-draft-checklist')
+
+    assert blob.downloads == 1
+    assert [item[0] for item in compiled.items] == ['1']
+
+
+def test_checklist_version_follows_item_definitions_not_the_version_field(tmp_path):
+    def compile_(source, generation):
+        registry = execute_checklist.ChecklistRegistry(FakeStorage(FakeBlob(source, generation)), snapshot_dir=str(tmp_path))
+        return registry.get('story-draft-checklist').version
+
+    item = b"items:\n  - {id: 1, description: Title, validation_method: automated, check: matches, args: {field: title, pattern: %s}}\n"
+
+    original = compile_(b"version: 2\n" + item % b"'^S'", 1)
+    assert compile_(b"version: 3\n" + item % b"'^S'", 2) == original
+    assert compile_(b"version: 2\n" + item % b"'^T'", 3) != original
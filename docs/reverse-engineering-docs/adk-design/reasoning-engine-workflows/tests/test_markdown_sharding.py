@@ -0,0 +1,86 @@
+"""Tests for the shared markdown sharding primitives"""
+
+import pytest
+
+import markdown_sharding
+from markdown_sharding import AnchorIndex, github_anchor, iter_lines, stream_markdown_sections
+
+
+@pytest.mark.parametrize('title, anchor', [
+    ("Overview", "overview"),
+    ("Foundation & Auth", "foundation--auth"),
+    ("  Epic 1: Auth  ", "epic-1-auth"),
+    ("Überblick ä", "überblick-ä"),
+    ("snake_case and kebab-case", "snake_case-and-kebab-case"),
+    ("`code` (v2.0)!", "code-v20"),
+])
+def test_github_anchor(title, anchor):
+    assert github_anchor(title) == anchor
+
+
+def test_anchor_index_dedupes_globally_and_per_file():
+    index = AnchorIndex.build([
+        ('overview.md', ['Overview', 'Details']),
+        ('epic-1.md', ['Epic 1', 'Overview', 'Overview']),
+    ])
+
+    assert index.resolve('overview') == ('overview.md', 'overview')
+    assert index.resolve('overview-1') == ('epic-1.md', 'overview')
+    assert index.resolve('overview-2') == ('epic-1.md', 'overview-1')
+    assert index.resolve('Details') == ('overview.md', 'details')
+    assert index.resolve('missing') is None
+    assert AnchorIndex.from_dict(index.to_dict()).targets == index.targets
+
+
+def test_sections_split_at_level_two_and_ignore_fenced_headings():
+    document = (
+        "# Title\n\nIntro\n\n"
+        "## First\n\n```\n## not a heading\n```\n\n"
+        "Second\n------\n\ntext\n"
+    )
+    sections = list(stream_markdown_sections(iter_lines(document)))
+
+    assert [section.title for section in sections] == [None, 'First', 'Second']
+    assert ''.join(line for section in sections for line in section.render(demote=False)) == document
+    assert sections[1].offset == markdown_sharding.byte_len("# Title\n\nIntro\n\n")
+    assert sections[2].offset + sections[2].length == markdown_sharding.byte_len(document)
+
+
+def test_render_demotes_headings_for_standalone_shards():
+    document = "## First\n\n### Detail\n\nSecond\n------\n"
+    first, second = stream_markdown_sections(iter_lines(document))
+
+    assert ''.join(first.render()) == "# First\n\n## Detail\n\n"
+    assert ''.join(second.render()) == "Second\n======\n"
+
+
+def test_rewrite_link_targets_skips_code():
+    document = (
+        "[a](#a) `[b](#b)` ``[c](`#c`)`` [d](#d)\n"
+        "\n"
+        "    [indented](#code)\n"
+        "\n"
+        "```\n"
+        "[fenced](#code)\n"
+        "```\n"
+        "- item\n"
+        "\n"
+        "    [continued](#e)\n"
+        "[ref]: #f\n"
+    )
+
+    rewritten = ''.join(markdown_sharding.rewrite_link_targets(iter_lines(document), str.upper))
+
+    assert rewritten == (
+        "[a](#A) `[b](#b)` ``[c](`#c`)`` [d](#D)\n"
+        "\n"
+        "    [indented](#code)\n"
+        "\n"
+        "```\n"
+        "[fenced](#code)\n"
+        "```\n"
+        "- item\n"
+        "\n"
+        "    [continued](#E)\n"
+        "[ref]: #F\n"
+    )
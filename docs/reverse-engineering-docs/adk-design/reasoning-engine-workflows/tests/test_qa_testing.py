@@ -0,0 +1,127 @@
+"""Tests for import-graph test selection and the test result cache"""
+
+import pytest
+
+import qa_testing
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A small Python project: app/ package, tests/ with a conftest"""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    root = tmp_path / 'repo'
+    files = {
+        'app/__init__.py': '',
+        'app/models.py': 'X = 1\n',
+        'app/views.py': 'from .models import X\n',
+        'app/util.py': 'Y = 2\n',
+        'tests/conftest.py': 'import pytest\n',
+        'tests/test_views.py': 'from app import views\n',
+        'tests/test_util.py': 'import app.util\n',
+    }
+    for path, content in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(content)
+    return root
+
+
+def impact_map(repo):
+    impact = qa_testing.TestImpactMap(str(repo))
+    impact.refresh()
+    return impact
+
+
+def test_tests_for_follows_transitive_imports(repo):
+    impact = impact_map(repo)
+
+    assert impact.tests_for(['app/models.py']) == ['tests/test_views.py']
+    assert impact.tests_for(['app/util.py']) == ['tests/test_util.py']
+    assert impact.tests_for(['app/__init__.py']) == ['tests/test_util.py', 'tests/test_views.py']
+
+
+def test_tests_for_is_none_outside_the_graph(repo):
+    impact = impact_map(repo)
+
+    assert impact.tests_for(['app/static/site.css']) is None
+    assert impact.tests_for(['tests/conftest.py']) is None
+
+
+def test_inputs_of_includes_transitive_imports_and_conftest(repo):
+    impact = impact_map(repo)
+
+    assert impact.inputs_of('tests/test_views.py') == [
+        'app/__init__.py', 'app/models.py', 'app/views.py', 'tests/conftest.py', 'tests/test_views.py'
+    ]
+
+
+def test_input_hash_changes_only_with_a_test_input(repo):
+    impact = impact_map(repo)
+    views, util = impact.input_hash('tests/test_views.py'), impact.input_hash('tests/test_util.py')
+
+    (repo / 'app/models.py').write_text('X = 3\n')
+    impact.update(['app/models.py'])
+    assert impact.input_hash('tests/test_views.py') != views
+    assert impact.input_hash('tests/test_util.py') == util
+
+    (repo / 'app/models.py').write_text('X = 1\n')
+    impact.update(['app/models.py'])
+    assert impact.input_hash('tests/test_views.py') == views
+
+
+def test_impact_map_is_cached_outside_the_tree(repo):
+    impact = impact_map(repo)
+
+    assert not impact.cache_path.startswith(str(repo))
+    assert qa_testing.TestImpactMap(str(repo)).files.keys() == impact.files.keys()
+
+
+class Runner:
+    """Records test executions; outcomes per test file"""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.runs = []
+
+    def tests(self, tests):
+        self.runs.append(sorted(tests))
+        return {test: self.outcomes[test] for test in tests}
+
+    def suite(self):
+        self.runs.append('suite')
+        return all(self.outcomes.values())
+
+
+def test_result_cache_reuses_passes_and_retries_failures(repo):
+    impact = impact_map(repo)
+    cache = qa_testing.TestResultCache(str(repo))
+    runner = Runner({'tests/test_views.py': False, 'tests/test_util.py': True})
+    tests = impact.test_files()
+
+    assert cache.run(impact, tests, runner.tests, runner.suite) is False
+    assert cache.run(impact, tests, runner.tests, runner.suite) is False
+    runner.outcomes['tests/test_views.py'] = True
+    assert cache.run(impact, tests, runner.tests, runner.suite) is True
+    assert cache.run(impact, tests, runner.tests, runner.suite) is True
+
+    assert runner.runs == [tests, ['tests/test_views.py'], ['tests/test_views.py']]
+
+
+def test_result_cache_reruns_tests_whose_inputs_changed(repo):
+    impact = impact_map(repo)
+    cache = qa_testing.TestResultCache(str(repo))
+    runner = Runner({'tests/test_views.py': True, 'tests/test_util.py': True})
+    cache.run(impact, impact.test_files(), runner.tests, runner.suite)
+
+    (repo / 'app/util.py').write_text('Y = 3\n')
+    cache.run(impact, impact.test_files(), runner.tests, runner.suite)
+
+    assert runner.runs[1:] == [['tests/test_util.py']]
+
+
+def test_full_suite_bypasses_the_cache(repo):
+    impact = impact_map(repo)
+    cache = qa_testing.TestResultCache(str(repo))
+    runner = Runner({'tests/test_views.py': True, 'tests/test_util.py': False})
+
+    assert cache.run(impact, None, runner.tests, runner.suite) is False
+    assert runner.runs == ['suite']
@@ -0,0 +1,206 @@
+"""Round trip of shard-doc and unshard-doc, and unshard-doc's per-shard restore"""
+
+import io
+import itertools
+
+import pytest
+from google.api_core import exceptions as gcp_exceptions
+
+import shard_doc
+import unshard_doc
+
+DOCUMENT = """# My PRD
+
+Intro with [link](#epic-1-auth), [ext](docs/x.md) and [ref][auth].
+
+[auth]: #epic-1-auth
+
+## Overview
+
+See [auth](#epic-1-auth) and [missing](#nope).
+
+### Details
+
+text
+
+```
+## not a heading
+```
+
+Epic 1: Auth
+---
+
+Body [over](#overview) [d](#details)
+
+### Overview
+
+## Überblick ä
+
+end
+"""
+
+
+class MemoryBlob:
+    """Object in MemoryStorage (just what the workflows call)"""
+
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+        stored = storage.objects.get(name)
+        self.metadata = dict(stored['metadata'] or {}) if stored else None
+        self.generation = stored['generation'] if stored else None
+
+    def upload_from_string(self, data, content_type=None):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.generation = next(self.storage.generations)
+        self.storage.objects[self.name] = {'data': data, 'metadata': self.metadata, 'generation': self.generation}
+        self.storage.uploads.append(self.name)
+
+    def upload_from_filename(self, filename, content_type=None):
+        with open(filename, 'rb') as f:
+            self.upload_from_string(f.read(), content_type)
+
+    def download_as_bytes(self, if_generation_match=None):
+        stored = self.storage.objects.get(self.name)
+        if stored is None:
+            raise gcp_exceptions.NotFound(self.name)
+        if if_generation_match is not None and stored['generation'] != if_generation_match:
+            raise gcp_exceptions.PreconditionFailed(self.name)
+        return stored['data']
+
+    def open(self, mode='rb', chunk_size=None):
+        return io.BytesIO(self.download_as_bytes())
+
+    def delete(self):
+        self.storage.objects.pop(self.name, None)
+
+
+class MemoryStorage:
+    """In-memory stand-in for a storage client with a single bucket"""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = []
+        self.generations = itertools.count(1)
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name):
+        return MemoryBlob(self, name)
+
+    def list_blobs(self, prefix=''):
+        return [MemoryBlob(self, name) for name in sorted(self.objects) if name.startswith(prefix)]
+
+
+def make_workflow(cls, storage):
+    workflow = cls.__new__(cls)
+    workflow.project_id = 'test'
+    workflow.db = None
+    workflow.storage = storage
+    return workflow
+
+
+@pytest.fixture
+def storage():
+    return MemoryStorage()
+
+
+def shard_and_unshard(storage, document):
+    storage.blob('docs/prd.md').upload_from_string(document)
+    sharded = make_workflow(shard_doc.ShardDocWorkflow, storage).execute('p', 'prd', 'docs/prd.md')
+    unsharded = make_workflow(unshard_doc.UnshardDocWorkflow, storage).execute('p', 'prd')
+    return sharded, unsharded, storage.objects['exports/prd.md']['data'].decode('utf-8')
+
+
+def test_round_trip_is_byte_identical(storage):
+    sharded, unsharded, output = shard_and_unshard(storage, DOCUMENT)
+
+    assert output == DOCUMENT
+    assert unsharded['byte_identical'] is True
+    assert unsharded['shard_count'] == sharded['shard_count'] == 3
+    epic = storage.objects['prd/epic-1-auth.md']['data'].decode('utf-8')
+    assert epic.startswith("Epic 1: Auth\n===\n")
+    assert "[over](./overview.md#overview)" in epic
+
+
+def test_round_trip_normalizes_crlf(storage):
+    _, unsharded, output = shard_and_unshard(storage, DOCUMENT.replace('\n', '\r\n'))
+
+    assert output == DOCUMENT
+    assert unsharded['byte_identical'] is True
+
+
+def test_reshard_of_unchanged_document_uploads_nothing(storage):
+    shard_and_unshard(storage, DOCUMENT)
+    storage.uploads.clear()
+
+    make_workflow(shard_doc.ShardDocWorkflow, storage).execute('p', 'prd', 'docs/prd.md')
+
+    assert [name for name in storage.uploads if name.startswith('prd/')] == []
+
+
+@pytest.mark.parametrize('link', [
+    "[x](./architecture.md)",
+    "[x](<./architecture.md#Intro>)",
+    "[x](#Section-A)",
+    "[x](#Epic-1-Auth)",
+    "[x](prd.md#section-a)",
+    "[x](./prd.md#overview)",
+])
+def test_round_trip_restores_links_as_written(storage, link):
+    document = f"# Doc\n\n{link}\n\n## Section A\n\n{link} `{link}`\n\n    {link}\n\n" + DOCUMENT.split('\n', 1)[1]
+
+    _, unsharded, output = shard_and_unshard(storage, document)
+
+    assert output == document
+    assert unsharded['byte_identical'] is True
+
+
+def test_unshard_saves_a_mismatched_reassembly_as_not_identical(storage):
+    shard_and_unshard(storage, DOCUMENT)
+    del storage.objects['exports/prd.md']
+    workflow = make_workflow(unshard_doc.UnshardDocWorkflow, storage)
+    workflow.restore_shard = lambda filename, content, *args: content
+
+    unsharded = workflow.execute('p', 'prd')
+
+    assert unsharded['byte_identical'] is False
+    assert 'exports/prd.md' in storage.objects
+
+
+def restore(content, is_index=False, inverse_anchors=None, shard_filenames=frozenset()):
+    workflow = make_workflow(unshard_doc.UnshardDocWorkflow, None)
+    return workflow.restore_shard('epic-1.md', content, is_index, inverse_anchors or {}, set(shard_filenames))
+
+
+def test_restore_shard_promotes_headings():
+    content = "# Epic 1\n\n## Story\n\n# Top level kept\n\n```\n# fenced\n```\n"
+
+    assert restore(content) == "## Epic 1\n\n### Story\n\n# Top level kept\n\n```\n# fenced\n```\n"
+
+
+def test_restore_shard_restores_setext_title():
+    assert restore("Epic 1\n======\n\nbody\n") == "Epic 1\n------\n\nbody\n"
+
+
+def test_restore_shard_leaves_index_headings():
+    assert restore("# PRD\n\n## Intro\n", is_index=True) == "# PRD\n\n## Intro\n"
+
+
+def test_restore_shard_maps_links_back():
+    inverse_anchors = {('epic-1.md', 'overview'): 'overview-1', ('overview.md', 'overview'): 'overview'}
+    content = (
+        "# Epic 1\n\n"
+        "[local](#overview) [other](./overview.md#overview) [wrapped](<overview.md#overview>)\n"
+        "[up](../docs/x.md) [web](https://example.com/#overview) [unknown](#nope)\n"
+        "[ref]: overview.md#overview\n"
+    )
+
+    assert restore(content, inverse_anchors=inverse_anchors, shard_filenames={'overview.md', 'epic-1.md'}) == (
+        "## Epic 1\n\n"
+        "[local](#overview-1) [other](#overview) [wrapped](<#overview>)\n"
+        "[up](docs/x.md) [web](https://example.com/#overview) [unknown](#nope)\n"
+        "[ref]: #overview\n"
+    )
@@ -0,0 +1,318 @@
+"""
+BMad Framework - Unshard Document Workflow
+==========================================
+
+Reasoning Engine implementation reversing the shard-doc task.
+
+**Primary Agent**: PM (PRD), Architect (Architecture), PO (coordination)
+**Workflow Type**: Document Reassembly (Sharded → Monolithic)
+**Analysis Reference**: analysis/tasks/shard-doc.md
+"""
+
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import tempfile
+from google.api_core import exceptions as gcp_exceptions
+from google.cloud import firestore, storage
+from google import adk
+from adk.workflows import WorkflowAgent, WorkflowStep
+
+from markdown_sharding import (
+    MANIFEST_FILENAME,
+    TRANSIENT_STORAGE_ERRORS,
+    URL_SCHEME_RE,
+    AnchorIndex,
+    DocumentType,
+    iter_lines,
+    rewrite_link_targets,
+    stream_markdown_sections,
+    with_retries,
+)
+
+
+@dataclass
+class ShardRef:
+    """Shard as recorded in the shard manifest"""
+    filename: str
+    order: int
+    sha256: str
+    size: int
+    generation: Optional[int] = None
+    # Link ordinal -> original target, for links shard-doc rewrote
+    links: Optional[Dict[int, str]] = None
+
+
+class UnshardDocWorkflow(WorkflowAgent):
+    """
+    Document reassembly workflow (sharded → monolithic structure).
+
+    Reverses ShardDocWorkflow using its manifest: shards are read in index
+    order, headings are promoted back one level, rewritten links get their
+    original targets back, and the generated index navigation is dropped.
+    The output is hashed as it is written and compared with the source hash
+    recorded at sharding time; a mismatch is reported (byte_identical
+    False) rather than discarding the output.
+
+    Used for export, LLM context and diffing against the v3 monolith.
+    """
+
+    # Shards fetched ahead of the writer (order is preserved)
+    PREFETCH_CONCURRENCY = 8
+    READ_ATTEMPTS = 4
+
+    # Errors worth retrying (throttling, server-side and connection failures)
+    TRANSIENT_READ_ERRORS = TRANSIENT_STORAGE_ERRORS
+
+    def __init__(self, project_id: str, **kwargs):
+        super().__init__()
+        self.project_id = project_id
+        self.db = firestore.Client(project=project_id)
+        self.storage = storage.Client(project=project_id)
+
+    @WorkflowStep(step_id="step_1_load_manifest", description="Load shard manifest")
+    def load_manifest(self, bmad_project_id: str, document_type: DocumentType) -> Dict:
+        """Load the manifest written by shard-doc"""
+        bucket = self.storage.bucket(f"bmad-{bmad_project_id}-artifacts")
+        blob = bucket.blob(f"{document_type.value}/{MANIFEST_FILENAME}")
+        try:
+            return json.loads(blob.download_as_bytes())
+        except gcp_exceptions.NotFound:
+            raise ValueError(
+                f"No shard manifest for '{document_type.value}'. "
+                "Run shard-doc before unsharding."
+            )
+
+    @WorkflowStep(step_id="step_2_plan_reassembly", description="Order shards for reassembly")
+    def plan_reassembly(self, manifest: Dict) -> List[ShardRef]:
+        """Index first (preamble), then shards in source order"""
+        refs = [
+            ShardRef(
+                filename=filename,
+                order=entry.get('order', 0),
+                sha256=entry['sha256'],
+                size=entry['size'],
+                generation=entry.get('generation'),
+                links={ordinal: original for ordinal, original in entry['links']} if 'links' in entry else None
+            )
+            for filename, entry in manifest.get('shards', {}).items()
+        ]
+        if not refs or 'order' not in next(iter(manifest['shards'].values())):
+            raise ValueError("Shard manifest predates reassembly support; re-run shard-doc")
+
+        return sorted(refs, key=lambda ref: ref.order)
+
+    @WorkflowStep(step_id="step_3_reassemble", description="Stream shards into one document")
+    def reassemble(
+        self,
+        bmad_project_id: str,
+        document_type: DocumentType,
+        manifest: Dict,
+        refs: List[ShardRef],
+        out: BinaryIO
+    ) -> Dict:
+        """
+        Write the restored document to out, one shard at a time.
+
+        Up to 2 × PREFETCH_CONCURRENCY shards are downloaded ahead while the
+        writer consumes them in order, so memory is bounded by that window
+        and time is dominated by storage reads. Each shard is written as it
+        is restored; nothing is concatenated across shards.
+        """
+        bucket = self.storage.bucket(f"bmad-{bmad_project_id}-artifacts")
+        output_dir = f"{document_type.value}/"
+
+        anchors = AnchorIndex.from_dict(manifest.get('anchors', {}))
+        inverse_anchors = {target: anchor for anchor, target in anchors.targets.items()}
+        shard_filenames = {ref.filename for ref in refs}
+
+        digest = hashlib.sha256()
+        size = 0
+
+        with ThreadPoolExecutor(max_workers=self.PREFETCH_CONCURRENCY) as pool:
+            pending = iter(refs)
+            window: deque = deque()
+
+            def schedule():
+                ref = next(pending, None)
+                if ref is not None:
+                    window.append((ref, pool.submit(self._fetch_shard, bucket, output_dir + ref.filename, ref)))
+
+            for _ in range(self.PREFETCH_CONCURRENCY * 2):
+                schedule()
+
+            while window:
+                ref, future = window.popleft()
+                schedule()
+                content = future.result().decode('utf-8')
+
+                if ref.order == 0:
+                    # Index: the preamble followed by generated navigation
+                    tail = manifest.get('index_tail_size', 0)
+                    encoded = content.encode('utf-8')
+                    content = encoded[:len(encoded) - tail].decode('utf-8')
+
+                restored = self.restore_shard(
+                    ref.filename, content, ref.order == 0, inverse_anchors, shard_filenames, ref.links
+                ).encode('utf-8')
+                out.write(restored)
+                digest.update(restored)
+                size += len(restored)
+
+        print(f"  ✓ Reassembled {len(refs)} shards ({size} bytes)")
+        return {'sha256': digest.hexdigest(), 'size': size}
+
+    @WorkflowStep(step_id="step_4_verify", description="Verify reassembled document")
+    def verify_reassembly(self, output: Dict, manifest: Dict) -> Optional[bool]:
+        """Compare with the source hash recorded at sharding time (None if unknown)"""
+        source = manifest.get('source', {})
+        if not source.get('sha256'):
+            return None
+        return source['sha256'] == output['sha256'] and source.get('size') == output['size']
+
+    def restore_shard(
+        self,
+        filename: str,
+        content: str,
+        is_index: bool,
+        inverse_anchors: Dict[Tuple[str, str], str],
+        shard_filenames: set,
+        original_links: Optional[Dict[int, str]] = None
+    ) -> str:
+        """
+        Undo shard-doc's edits to one shard.
+
+        Section shards had every heading except level 1 demoted, so the
+        title and all headings of level 2 and deeper are promoted again
+        (ATX gets its '#' back, a setext title its '-' underline). The index
+        preamble was never demoted. Rewritten links get back the original
+        targets recorded in the manifest (by link ordinal); for manifests
+        without them, links are mapped back through the anchor index and
+        "../" added to other relative links is removed, which may not
+        reproduce every link exactly.
+        """
+        sections = list(stream_markdown_sections(iter_lines(content), split_level=0))
+        if not sections:
+            return ''
+        section = sections[0]
+
+        promote_atx = set()
+        restore_underline = set()
+        if not is_index:
+            for i, heading in enumerate(section.headings):
+                if i == 0 and heading.line_index == 0:
+                    # Shard title, originally the level-2 split heading
+                    if heading.underline_index is not None:
+                        restore_underline.add(heading.underline_index)
+                    else:
+                        promote_atx.add(heading.line_index)
+                elif heading.level > 1 and heading.underline_index is None:
+                    promote_atx.add(heading.line_index)
+
+        def restore_target(target: str) -> str:
+            wrapped = target.startswith('<') and target.endswith('>')
+            bare = target[1:-1] if wrapped else target
+            if URL_SCHEME_RE.match(bare) or bare.startswith('/'):
+                return target
+
+            path, _, anchor = bare.partition('#')
+            normalized_path = path[2:] if path.startswith('./') else path
+            if anchor and (normalized_path == '' or normalized_path in shard_filenames):
+                original = inverse_anchors.get((normalized_path or filename, anchor))
+                new = f"#{original}" if original is not None else bare
+            elif path.startswith('../'):
+                new = path[3:] + (f"#{anchor}" if anchor else '')
+            else:
+                return target
+
+            return f"<{new}>" if wrapped else new
+
+        ordinal = -1
+
+        def restore_recorded(target: str) -> str:
+            nonlocal ordinal
+            ordinal += 1
+            return original_links.get(ordinal, target)
+
+        def promoted():
+            for i, line in enumerate(section.lines):
+                if i in promote_atx:
+                    hash_pos = line.index('#')
+                    line = line[:hash_pos] + '#' + line[hash_pos:]
+                elif i in restore_underline:
+                    line = line.replace('=', '-')
+                yield line
+
+        restore = restore_target if original_links is None else restore_recorded
+        return ''.join(rewrite_link_targets(promoted(), restore))
+
+    def execute(
+        self,
+        bmad_project_id: str,
+        document_type: str,  # "prd" or "architecture"
+        output_path: Optional[str] = None
+    ) -> Dict:
+        """Execute document reassembly workflow"""
+        doc_type = DocumentType(document_type)
+        output_path = output_path or f"exports/{doc_type.value}.md"
+
+        manifest = self.load_manifest(bmad_project_id, doc_type)
+        refs = self.plan_reassembly(manifest)
+
+        # Stream into a local temp file, then upload it in one request
+        handle, path = tempfile.mkstemp(prefix='bmad-unshard-', suffix='.md')
+        try:
+            with os.fdopen(handle, 'wb') as out:
+                output = self.reassemble(bmad_project_id, doc_type, manifest, refs, out)
+
+            byte_identical = self.verify_reassembly(output, manifest)
+            if byte_identical is False:
+                print(
+                    f"  ! Reassembled document differs from the original source "
+                    f"({output['sha256']}, {output['size']} bytes; expected "
+                    f"{manifest['source']['sha256']}, {manifest['source'].get('size')} bytes); "
+                    "re-run shard-doc to record original link targets"
+                )
+
+            self._save_output(bmad_project_id, output_path, path, output['sha256'])
+        finally:
+            os.unlink(path)
+
+        return {
+            'success': True,
+            'document_type': doc_type.value,
+            'output_path': output_path,
+            'shard_count': len(refs) - 1,
+            'sha256': output['sha256'],
+            'size': output['size'],
+            'source_sha256': manifest.get('source', {}).get('sha256'),
+            'byte_identical': byte_identical,
+            'reassembled_at': datetime.now().isoformat()
+        }
+
+    def _fetch_shard(self, bucket: storage.Bucket, blob_name: str, ref: ShardRef) -> bytes:
+        """Read one shard pinned to its manifest generation, retrying transient errors"""
+        try:
+            data = with_retries(
+                lambda: bucket.blob(blob_name).download_as_bytes(if_generation_match=ref.generation),
+                self.READ_ATTEMPTS, self.TRANSIENT_READ_ERRORS
+            )
+        except gcp_exceptions.PreconditionFailed:
+            raise RuntimeError(f"Shard {ref.filename} was re-sharded during reassembly; retry")
+
+        if hashlib.sha256(data).hexdigest() != ref.sha256:
+            raise ValueError(f"Shard {ref.filename} does not match its manifest hash")
+        return data
+
+    def _save_output(self, project_id: str, output_path: str, local_path: str, content_hash: str):
+        """Upload the reassembled document"""
+        bucket = self.storage.bucket(f"bmad-{project_id}-artifacts")
+        blob = bucket.blob(output_path)
+        blob.metadata = {'content_sha256': content_hash}
+        blob.upload_from_filename(local_path, content_type='text/markdown; charset=utf-8')
+        print(f"  ✓ Saved reassembled document: {output_path}")
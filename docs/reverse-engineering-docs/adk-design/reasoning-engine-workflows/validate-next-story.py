@@ -9,10 +9,11 @@ Reasoning Engine implementation for validate-next-story task.
 **Analysis Reference**: analysis/tasks/validate-next-story.md
 """
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
+from functools import lru_cache
 from google.cloud import firestore
 from google import adk
 from adk.workflows import WorkflowAgent, WorkflowStep
@@ -32,6 +33,121 @@ class ValidationCheck:
     notes: str = ""
 
 
+# Rules used when the project config does not define storyValidation
+DEFAULT_REQUIRED_SECTIONS = ('title', 'user_story', 'acceptance_criteria', 'technical_context', 'dev_notes')
+DEFAULT_REQUIRED_TECHNICAL_CONTEXT = ('tech_stack', 'coding_standards', 'testing_strategy')
+
+
+class ValidationPlan:
+    """
+    Story validation rules compiled once per rule set.
+
+    Each rule is a presence check on a section path ('/' for nested
+    fields). run() evaluates every rule against a story dict and returns an
+    int bitmap (bit i set = rule i passed), allocating nothing per rule.
+    Check names and notes are only built when a report is rendered.
+    """
+
+    def __init__(self, sections: Tuple[str, ...], technical_context: Tuple[str, ...]):
+        self.sections = sections
+        self.technical_context = technical_context
+        self.paths = sections + tuple(f"technical_context/{element}" for element in technical_context)
+        self._keys = tuple(tuple(path.split('/')) for path in self.paths)
+        self.all_passed = (1 << len(self.paths)) - 1
+        self.section_mask = (1 << len(sections)) - 1
+        self._names: Optional[List[str]] = None
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def compile(sections: Tuple[str, ...], technical_context: Tuple[str, ...]) -> 'ValidationPlan':
+        return ValidationPlan(sections, technical_context)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'ValidationPlan':
+        """Compile from the project's storyValidation config (defaults if absent)"""
+        rules = config.get('storyValidation') or {}
+        sections = rules.get('requiredSections', DEFAULT_REQUIRED_SECTIONS)
+        elements = rules.get('requiredTechnicalContext', DEFAULT_REQUIRED_TECHNICAL_CONTEXT)
+        for value in list(sections) + list(elements):
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"Invalid storyValidation rule: {value!r}")
+        return cls.compile(tuple(sections), tuple(elements))
+
+    def run(self, story: Dict) -> int:
+        """Bitmap of passed rules (presence flags first, values for legacy stories)"""
+        presence = story.get('section_presence') or {}
+        bits = 0
+        bit = 1
+        for path, keys in zip(self.paths, self._keys):
+            passed = presence.get(path)
+            if passed is None:
+                value = story
+                for key in keys:
+                    value = value.get(key) if isinstance(value, dict) else None
+                passed = value
+            if passed:
+                bits |= bit
+            bit <<= 1
+        return bits
+
+    def fields_not_covered(self, presence: Optional[Dict]) -> List[str]:
+        """
+        Dotted field paths (technical_context.tech_stack) needed for rules the
+        presence flags don't answer, so only those nested values are read.
+        """
+        presence = presence or {}
+        return self.outermost_paths(
+            '.'.join(keys) for path, keys in zip(self.paths, self._keys) if path not in presence
+        )
+
+    @staticmethod
+    def outermost_paths(paths: Iterable[str]) -> List[str]:
+        """Sorted field paths without those nested under another path (its read returns them)"""
+        unique = set(paths)
+        return sorted(
+            path for path in unique
+            if not any(path.startswith(parent + '.') for parent in unique)
+        )
+
+    def run_batch(self, stories: Iterable[Dict]) -> List[int]:
+        run = self.run
+        return [run(story) for story in stories]
+
+    def passed(self, bits: int) -> bool:
+        return bits == self.all_passed
+
+    def failed_names(self, bits: int) -> List[str]:
+        """Names of the rules a bitmap failed"""
+        names = self.check_names()
+        return [names[i] for i in range(len(self.paths)) if not bits >> i & 1]
+
+    def check_names(self) -> List[str]:
+        """Human-readable check names, built on first use"""
+        if self._names is None:
+            self._names = [
+                f"{section.replace('_', ' ').title()} present" for section in self.sections
+            ] + [
+                f"Technical context includes {element.replace('_', ' ')}" for element in self.technical_context
+            ]
+        return self._names
+
+    def render(self, bits: int, mask: Optional[int] = None) -> List[ValidationCheck]:
+        """Expand a bitmap into ValidationChecks (optionally only the rules in mask)"""
+        names = self.check_names()
+        checks = []
+        for i, path in enumerate(self.paths):
+            if mask is not None and not mask >> i & 1:
+                continue
+            passed = bool(bits >> i & 1)
+            is_section = i < len(self.sections)
+            checks.append(ValidationCheck(
+                check_name=names[i],
+                passed=passed,
+                notes="" if passed or not is_section else f"Missing {path}"
+            ))
+        return checks
+
+
 class ValidateNextStoryWorkflow(WorkflowAgent):
     """
     Pre-implementation story validation by PO.
@@ -44,49 +160,41 @@ class ValidateNextStoryWorkflow(WorkflowAgent):
     - Alignment with product vision
     """
 
+    # Firestore allows at most 500 writes per batch
+    WRITE_BATCH_SIZE = 500
+
+    # Story fields read by this workflow: presence flags written by
+    # create-next-story and the time they were computed; section values are
+    # only read for rules the flags do not cover (e.g. stories saved before
+    # the flags existed) or when the story was written after the flags were
+    STORY_FIELDS = ['section_presence', 'section_presence_at']
+
     def __init__(self, project_id: str, **kwargs):
         super().__init__()
         self.project_id = project_id
         self.db = firestore.Client(project=project_id)
 
     @WorkflowStep(step_id="step_1_check_completeness", description="Validate story completeness")
-    def check_completeness(self, story_data: Dict) -> List[ValidationCheck]:
-        """Validate all required story sections present"""
-        checks = []
-
-        # Required sections
-        required_sections = [
-            'title', 'user_story', 'acceptance_criteria',
-            'technical_context', 'dev_notes'
-        ]
-
-        for section in required_sections:
-            passed = section in story_data and story_data[section]
-            checks.append(ValidationCheck(
-                check_name=f"{section.replace('_', ' ').title()} present",
-                passed=passed,
-                notes="" if passed else f"Missing {section}"
-            ))
-
-        return checks
+    def check_completeness(
+        self,
+        plan: ValidationPlan,
+        story_data: Dict,
+        bits: Optional[int] = None
+    ) -> List[ValidationCheck]:
+        """Validate all required story sections present (bits: plan.run result, if already computed)"""
+        bits = plan.run(story_data) if bits is None else bits
+        return plan.render(bits, mask=plan.section_mask)
 
     @WorkflowStep(step_id="step_2_check_technical_context", description="Check technical context adequacy")
-    def check_technical_context(self, story_data: Dict) -> List[ValidationCheck]:
-        """Validate technical context is adequate"""
-        checks = []
-        tech_context = story_data.get('technical_context', {})
-
-        # Check for key architecture elements
-        required_elements = ['tech_stack', 'coding_standards', 'testing_strategy']
-
-        for element in required_elements:
-            passed = element in tech_context and tech_context[element]
-            checks.append(ValidationCheck(
-                check_name=f"Technical context includes {element.replace('_', ' ')}",
-                passed=passed
-            ))
-
-        return checks
+    def check_technical_context(
+        self,
+        plan: ValidationPlan,
+        story_data: Dict,
+        bits: Optional[int] = None
+    ) -> List[ValidationCheck]:
+        """Validate technical context is adequate (bits: plan.run result, if already computed)"""
+        bits = plan.run(story_data) if bits is None else bits
+        return plan.render(bits, mask=plan.all_passed & ~plan.section_mask)
 
     @WorkflowStep(step_id="step_3_make_decision", description="Make approval decision")
     def make_approval_decision(self, all_checks: List[ValidationCheck]) -> ValidationResult:
@@ -97,16 +205,10 @@ class ValidateNextStoryWorkflow(WorkflowAgent):
 
     def execute(self, bmad_project_id: str, story_id: str) -> Dict:
         """Execute story validation workflow"""
-        story = self._load_story(bmad_project_id, story_id)
-
-        # Perform validation checks
-        completeness_checks = self.check_completeness(story)
-        tech_checks = self.check_technical_context(story)
+        plan = self._load_plan(bmad_project_id)
+        story = self._load_story(bmad_project_id, story_id, plan)
 
-        all_checks = completeness_checks + tech_checks
-
-        # Make decision
-        result = self.make_approval_decision(all_checks)
+        result, checks = self._validate(plan, story, plan.run(story))
 
         # Update story status if approved
         if result == ValidationResult.APPROVED:
@@ -116,13 +218,132 @@ class ValidateNextStoryWorkflow(WorkflowAgent):
             'success': True,
             'story_id': story_id,
             'validation_result': result.value,
-            'checks_passed': sum(1 for c in all_checks if c.passed),
-            'checks_total': len(all_checks)
+            'checks_passed': sum(1 for check in checks if check.passed),
+            'checks_total': len(checks)
         }
 
-    def _load_story(self, project_id: str, story_id: str) -> Dict:
-        return self.db.collection('projects').document(project_id).collection('stories').document(story_id).get().to_dict()
+    def execute_bulk(self, bmad_project_id: str, status: str = 'draft') -> Dict:
+        """
+        Validate every story in the given status (PO sweep before sprint planning).
+
+        Stories are loaded with a single query, validated in memory, and
+        approvals are committed in batched writes instead of one update per
+        story. Returns a per-story report.
+
+        Rules are evaluated in one pass through the project's compiled
+        ValidationPlan, giving each story a pass/fail bitmap (bit i =
+        checks[i]). The decision is made on the bitmap alone; no
+        ValidationChecks are built, and only failing stories have their
+        failed check names listed.
+        """
+        plan = self._load_plan(bmad_project_id)
+        stories = self._load_stories_by_status(bmad_project_id, status, plan)
+        bitmaps = plan.run_batch(story for _, story in stories)
+        checks_total = len(plan.paths)
+
+        report = []
+        approved_ids = []
+        for (story_id, _), bits in zip(stories, bitmaps):
+            if plan.passed(bits):
+                approved_ids.append(story_id)
+                result, failed = ValidationResult.APPROVED, []
+            else:
+                result, failed = ValidationResult.CHANGES_REQUIRED, plan.failed_names(bits)
+
+            report.append({
+                'story_id': story_id,
+                'validation_result': result.value,
+                'check_bitmap': bits,
+                'checks_passed': checks_total - len(failed),
+                'checks_total': checks_total,
+                'failed_checks': failed
+            })
+
+        self._update_story_statuses(bmad_project_id, approved_ids, 'approved')
+        print(f"  ✓ Validated {len(report)} {status} stories ({len(approved_ids)} approved)")
+
+        return {
+            'success': True,
+            'status': status,
+            'stories_validated': len(report),
+            'stories_approved': len(approved_ids),
+            'checks': plan.check_names(),
+            'stories': report
+        }
+
+    def _validate(self, plan: ValidationPlan, story: Dict, bits: int) -> Tuple[ValidationResult, List[ValidationCheck]]:
+        """Run the check steps over a story's rule bitmap and decide"""
+        checks = self.check_completeness(plan, story, bits) + self.check_technical_context(plan, story, bits)
+        return self.make_approval_decision(checks), checks
+
+    def _load_plan(self, project_id: str) -> ValidationPlan:
+        """Compile (or reuse) the validation plan from project config"""
+        project = self.db.collection('projects').document(project_id).get(field_paths=['config.storyValidation'])
+        config = (project.to_dict() or {}).get('config', {}) if project.exists else {}
+        return ValidationPlan.from_config(config)
+
+    def _load_story(self, project_id: str, story_id: str, plan: ValidationPlan) -> Dict:
+        story_ref = self.db.collection('projects').document(project_id).collection('stories').document(story_id)
+        snapshot = story_ref.get(field_paths=self.STORY_FIELDS)
+        story = snapshot.to_dict()
+        if story is not None:
+            self._drop_stale_presence(snapshot, story)
+            fields = plan.fields_not_covered(story.get('section_presence'))
+            if fields:
+                story.update(story_ref.get(field_paths=fields).to_dict() or {})
+        return story
+
+    def _load_stories_by_status(self, project_id: str, status: str, plan: ValidationPlan) -> List[Tuple[str, Dict]]:
+        stories_ref = self.db.collection('projects').document(project_id).collection('stories')
+        query = stories_ref.where('status', '==', status).select(self.STORY_FIELDS)
+        stories = []
+        for doc in query.stream():
+            story = doc.to_dict()
+            self._drop_stale_presence(doc, story)
+            stories.append((doc.id, story))
+
+        # Only stories whose flags don't cover every rule read section values
+        needed = {
+            story_id: plan.fields_not_covered(story.get('section_presence'))
+            for story_id, story in stories
+        }
+        uncovered_ids = [story_id for story_id, fields in needed.items() if fields]
+        if uncovered_ids:
+            fields = ValidationPlan.outermost_paths(field for story_id in uncovered_ids for field in needed[story_id])
+            sections = {
+                doc.id: doc.to_dict() or {}
+                for doc in self.db.get_all(
+                    [stories_ref.document(story_id) for story_id in uncovered_ids],
+                    field_paths=fields
+                )
+            }
+            for story_id, story in stories:
+                story.update(sections.get(story_id, {}))
+
+        return stories
+
+    def _drop_stale_presence(self, snapshot, story: Dict):
+        """
+        Discard presence flags unless they were written with the story's last update.
+
+        create-next-story stamps the flags with the write's server timestamp,
+        so any later write (an edit made outside that workflow included) leaves
+        them older than the document's update_time; the sections are then read.
+        """
+        computed_at = story.get('section_presence_at')
+        if computed_at is None or snapshot.update_time is None or computed_at < snapshot.update_time:
+            story.pop('section_presence', None)
 
     def _update_story_status(self, project_id: str, story_id: str, status: str):
         story_ref = self.db.collection('projects').document(project_id).collection('stories').document(story_id)
         story_ref.update({'status': status, 'approved_at': datetime.now().isoformat()})
+
+    def _update_story_statuses(self, project_id: str, story_ids: List[str], status: str):
+        """Update many story statuses using batched writes"""
+        stories = self.db.collection('projects').document(project_id).collection('stories')
+        approved_at = datetime.now().isoformat()
+        for start in range(0, len(story_ids), self.WRITE_BATCH_SIZE):
+            batch = self.db.batch()
+            for story_id in story_ids[start:start + self.WRITE_BATCH_SIZE]:
+                batch.update(stories.document(story_id), {'status': status, 'approved_at': approved_at})
+            batch.commit()